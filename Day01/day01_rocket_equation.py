@@ -72,15 +72,6 @@ def calculate_total_fuel(calc: Callable, module_list: List[int]) -> int:
         
     return total
 
-assert (calculate_fuel(12) == 2)
-assert (calculate_fuel(14) == 2)
-assert (calculate_fuel(1969) == 654)
-assert (calculate_fuel(100756) == 33583)
-
-assert (calculate_fuel_recursive(14) == 2)
-assert (calculate_fuel_recursive(1969) == 966)
-assert (calculate_fuel_recursive(100756) == 50346)
-
 if __name__ == '__main__':
     with open ('day01_input.txt', 'r') as inp:
         modules = [int(line.strip()) for line in inp]
@@ -41,76 +41,113 @@ answer would be 1202.)
 
 """
 
-from typing import List, Tuple
-# import sys
+import os
+import sys
+from typing import List, Optional, Tuple
+from functools import partial
+
+if __name__ == '__main__':
+    # Run as a script from its day directory: make the shared package importable
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import VM
+from intcode.search import map_chunks
 
 OUTPUT = 19690720
 
+# Nouns and verbs are each between 0 and 99, inclusive
+LIMIT = 100
+
+# Brute force searches smaller than this are not worth a process pool
+SERIAL_RUNS = 1000
+
 def run_intcode(prog: List[int]) -> List[int]:
-    address = 0
+    vm = VM(prog)
     
-    length = len(prog)
+    try:
+        halted = vm.run()
+    except (ValueError, IndexError):
+        halted = False
     
-    while prog[address] != 99:
-        
-        # Make sure address is not too close to end of program
-        if address > length - 3:
-            prog[0] = -1
-            break
-        
-        opcode = prog[address]
-        p1 = prog[prog[address + 1]]
-        p2 = prog[prog[address + 2]]
-        dest = prog[address + 3]
-        
-        # Make sure dest is within bounds of program list
-        if dest > length - 1:
-            prog[0] = -1
-            break
-        
-        # Add
-        if (opcode == 1):
-            prog[dest] = p1 + p2
-        elif (opcode == 2):
-            prog[dest] = p1 * p2
-        else:
-            # sys.exit('Error: Invalid instruction code\n')
-            prog[0] = -1
-            break
+    # Flag programs that fail or write outside the bounds of the program list;
+    # the size is checked first, as dumping a far store would fill the gap
+    if not halted or vm.memory.size > len(prog):
+        prog[0] = -1
+    else:
+        prog[:] = vm.dump()
+    
+    return prog
+
+def get_output(prog: List[int], noun: int, verb: int) -> int:
+    temp_prog = prog.copy()
+    temp_prog[1] = noun
+    temp_prog[2] = verb
+    return run_intcode(temp_prog)[0]
+
+def solve_linear(prog: List[int], match: int, limit: int = LIMIT) -> Optional[Tuple[int, int]]:
+    # Fit output = base + a * noun + b * verb from three runs
+    base = get_output(prog, 0, 0)
+    a = get_output(prog, 1, 0) - base
+    b = get_output(prog, 0, 1) - base
+    
+    # Check the fit on a few more points before trusting it
+    for noun, verb in ((1, 1), (limit - 1, 0), (0, limit - 1), (limit // 2, limit // 3)):
+        if get_output(prog, noun, verb) != base + a * noun + b * verb:
+            return None
     
-        address += 4
+    for noun in range(limit):
+        rest = match - base - a * noun
+        if b == 0:
+            verb = 0 if rest == 0 else None
+        elif rest % b == 0 and 0 <= rest // b < limit:
+            verb = rest // b
+        else:
+            verb = None
         
-        # Make sure address is within bounds of program list
-        if address > length - 1 :
-            prog[0] = -1
-            break
+        if verb is not None:
+            return (noun, verb)
     
-    return prog
+    return (-1, -1)
 
-def find_output(prog: List[int], match:int) -> Tuple[int, int]:
-    noun = -1
-    verb = -1
-    result = 0
-    length = len(prog)
+def scan_nouns(prog: List[int], nouns: range, match: int, limit: int) -> Tuple[int, int]:
+    # NumPy is only needed on this path, so it is not imported with the module
+    from intcode.batch import run_batch
+    
+    # Every (noun, verb) pair of the batch runs in lockstep
+    pairs = [(noun, verb) for noun in nouns for verb in range(limit)]
+    vms = run_batch(prog, [{1: noun, 2: verb} for noun, verb in pairs])
     
-    while result != match:
-        noun += 1
-        verb = -1
-        while result != match and verb < length - 1:
-            verb += 1
-            temp_prog = prog.copy()
-            temp_prog[1] = noun
-            temp_prog[2] = verb
-            result = run_intcode(temp_prog)[0]
-        if result == match:
-            break
+    for pair, vm in zip(pairs, vms):
+        # Same rules as run_intcode: must halt without writing past the end
+        if vm.halted and vm.memory.size <= len(prog) and vm.memory[0] == match:
+            return pair
     
-    return (noun, verb)
+    return (-1, -1)
 
-assert run_intcode([1,0,0,0,99]) == [2,0,0,0,99]
-assert run_intcode([2,3,0,3,99]) == [2,3,0,6,99]
-assert run_intcode([2,4,4,5,99,0]) == [2,4,4,5,99,9801]
-assert run_intcode([1,1,1,4,99,5,6,0,99]) == [30,1,1,4,2,5,6,0,99]
+def find_output_brute(prog: List[int], match: int, limit: int = LIMIT,
+                      workers: int = None) -> Tuple[int, int]:
+    scan = partial(scan_nouns, match=match, limit=limit)
+    if workers == 1 or limit * limit < SERIAL_RUNS:
+        return scan(prog, range(limit))
+    
+    # One batch of nouns per task, with the program shipped to each worker
+    # once; the batches come back in noun order
+    batch = 10
+    batches = [range(n, min(n + batch, limit)) for n in range(0, limit, batch)]
+    for found in map_chunks(scan, batches, prog, workers):
+        if found != (-1, -1):
+            return found
+    
+    return (-1, -1)
+
+def find_output(prog: List[int], match:int, limit: int = LIMIT) -> Tuple[int, int]:
+    # Noun and verb must be valid addresses in the program
+    limit = min(limit, len(prog))
+    
+    found = solve_linear(prog, match, limit)
+    if found is not None and (found == (-1, -1) or get_output(prog, *found) == match):
+        return found
+    
+    return find_output_brute(prog, match, limit)
 
 if __name__ == '__main__':
     with open ('day02_input.txt', 'r') as inp:
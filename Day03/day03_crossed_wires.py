@@ -52,7 +52,9 @@ PART 2
 
 
 """
-from typing import List, Tuple, Set, Dict
+from typing import List, Optional, Tuple, Set, Dict
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
 
 class Wire:
     def __init__ (self, route: List[str]):
@@ -85,7 +87,8 @@ class Wire:
                     self.y -= 1
                 
                 self.nodes.add((self.x, self.y))
-                self.node_dict[(self.x, self.y)] = self.steps                
+                # Latency counts the first time the wire gets here
+                self.node_dict.setdefault((self.x, self.y), self.steps)
                     
     def getNodes(self) -> Set[Tuple[int, int]]:
         return self.nodes
@@ -96,21 +99,260 @@ class Wire:
         
         colls = self.nodes.intersection(other.getNodes())
         
-        for n in other.getNodes():
-            if n in self.nodes:
-                # colls.add(n)
-                coll_dict[n] = self.node_dict[n] + other.node_dict[n]
+        # Only the shared cells need a lookup, not every cell of `other`
+        for n in colls:
+            coll_dict[n] = self.node_dict[n] + other.node_dict[n]
                 
         return colls, coll_dict
                     
 
+# A straight run of wire from (x1, y1) to (x2, y2); `steps` is the wire length
+# up to (x1, y1). The start point belongs to the previous segment.
+Segment = namedtuple('Segment', 'x1 y1 x2 y2 steps')
+
+MOVES = {'R': (1, 0), 'L': (-1, 0), 'U': (0, 1), 'D': (0, -1)}
+
+class SegmentWire:
+    def __init__ (self, route: List[str]):
+        self.segments = []
+        self.x = 0
+        self.y = 0
+        self.steps = 0
+        self.addRoute(route)
+        
+    def __str__(self):
+        return f'There are {self.steps} in this Wire.'
+        
+    def getSize(self) -> int:
+        return self.steps
+        
+    def addRoute(self, route):
+        for r in route:
+            dx, dy = MOVES[r[0]]
+            distance = int(r[1:])
+            if distance == 0:
+                continue
+            x2 = self.x + dx * distance
+            y2 = self.y + dy * distance
+            self.segments.append(Segment(self.x, self.y, x2, y2, self.steps))
+            self.x, self.y = x2, y2
+            self.steps += distance
+    
+    def getCollisions(self, other: any) -> Tuple[Set[Tuple[int, int]], Dict[Tuple[int,int],int]]:
+        coll_dict = find_crossings(self.segments, other.segments)
+        return set(coll_dict), coll_dict
+
+def is_horizontal(seg: Segment) -> bool:
+    return seg.y1 == seg.y2
+
+# Crossings per pair of wire ids (i < j): {(x, y): combined steps}
+Crossings = Dict[Tuple[int, int], Dict[Tuple[int, int], int]]
+
+# A segment tagged with the id of the wire it belongs to
+Tagged = Tuple[int, Segment]
+
+def pair_of(crossings: Crossings, i: int, j: int) -> Dict[Tuple[int, int], int]:
+    return crossings.setdefault((i, j) if i < j else (j, i), {})
+
+def sweep_crossings(crossings: Crossings, horizontals: List[Tagged],
+                    verticals: List[Tagged]) -> None:
+    # Sweep a vertical line left to right over the horizontal segments; the
+    # ones it currently cuts are kept sorted by y, so each vertical segment
+    # only looks at the ys inside its own range
+    events = []
+    for k, (_, h) in enumerate(horizontals):
+        events.append((min(h.x1, h.x2), 0, k))
+        events.append((max(h.x1, h.x2), 2, k))
+    for k, (_, v) in enumerate(verticals):
+        events.append((v.x1, 1, k))
+    events.sort()
+    
+    active = []
+    for x, kind, k in events:
+        if kind == 0:
+            insort(active, (horizontals[k][1].y1, k))
+        elif kind == 2:
+            del active[bisect_left(active, (horizontals[k][1].y1, k))]
+        else:
+            j, v = verticals[k]
+            lo = bisect_left(active, (min(v.y1, v.y2), -1))
+            hi = bisect_right(active, (max(v.y1, v.y2), len(horizontals)))
+            for y, h in active[lo:hi]:
+                i, seg = horizontals[h]
+                # Neither wire visits its segment's start point through
+                # that segment
+                if i == j or x == seg.x1 or y == v.y1:
+                    continue
+                steps = seg.steps + abs(x - seg.x1) + v.steps + abs(y - v.y1)
+                pair = pair_of(crossings, i, j)
+                if steps < pair.get((x, y), steps + 1):
+                    pair[(x, y)] = steps
+
+def overlap_crossings(crossings: Crossings, segments: List[Tagged],
+                      horizontal: bool) -> None:
+    # Collinear segments of two wires share every cell of their overlap
+    lines = {}
+    for tagged in segments:
+        seg = tagged[1]
+        a, b = (seg.x1, seg.x2) if horizontal else (seg.y1, seg.y2)
+        line = seg.y1 if horizontal else seg.x1
+        lines.setdefault(line, []).append((min(a, b), max(a, b), tagged))
+    
+    for line, spans in lines.items():
+        # Sweep along the line, keeping the spans that reach the current one
+        spans.sort(key=lambda span: span[0])
+        active = []
+        for lo, hi, tagged in spans:
+            active = [span for span in active if span[1] >= lo]
+            i, seg = tagged
+            for _, other_hi, (j, other) in active:
+                if i == j:
+                    continue
+                # Positions along the line of both segments' start points
+                start, other_start = (seg.x1, other.x1) if horizontal else (seg.y1, other.y1)
+                pair = pair_of(crossings, i, j)
+                for pos in range(lo, min(hi, other_hi) + 1):
+                    if pos == start or pos == other_start:
+                        continue
+                    steps = seg.steps + abs(pos - start) + other.steps + abs(pos - other_start)
+                    point = (pos, line) if horizontal else (line, pos)
+                    if steps < pair.get(point, steps + 1):
+                        pair[point] = steps
+            active.append((lo, hi, tagged))
+
+def find_all_crossings(segments: List[Tagged]) -> Crossings:
+    crossings = {}
+    
+    horizontals = [t for t in segments if is_horizontal(t[1])]
+    verticals = [t for t in segments if not is_horizontal(t[1])]
+    
+    sweep_crossings(crossings, horizontals, verticals)
+    overlap_crossings(crossings, horizontals, True)
+    overlap_crossings(crossings, verticals, False)
+    
+    # An overlap can consist of nothing but start points
+    return {pair: points for pair, points in crossings.items() if points}
+
+def find_crossings(mine: List[Segment], theirs: List[Segment]) -> Dict[Tuple[int, int], int]:
+    tagged = [(0, s) for s in mine] + [(1, s) for s in theirs]
+    return find_all_crossings(tagged).get((0, 1), {})
+
+class CollisionIndex:
+    def __init__ (self, wires: List[SegmentWire] = None):
+        self.segments = []
+        self.count = 0
+        self.crossings = None
+        for wire in wires or []:
+            self.addWire(wire)
+    
+    def __str__(self):
+        return f'There are {self.count} Wires in this index.'
+        
+    def addWire(self, wire: SegmentWire) -> int:
+        # Wires are numbered in the order they were added
+        wire_id = self.count
+        self.segments.extend((wire_id, s) for s in wire.segments)
+        self.count += 1
+        self.crossings = None
+        return wire_id
+    
+    def getCrossings(self) -> Crossings:
+        # One sweep over every wire's segments finds all pairs at once
+        if self.crossings is None:
+            self.crossings = find_all_crossings(self.segments)
+        return self.crossings
+    
+    def getClosest(self) -> Optional[Tuple[int, Tuple[int, int], Tuple[int, int]]]:
+        # (Manhattan distance, wire pair, crossing) of the nearest crossing
+        return min(((abs(x) + abs(y), pair, (x, y))
+                    for pair, points in self.getCrossings().items()
+                    for x, y in points), default=None)
+    
+    def getFastest(self) -> Optional[Tuple[int, Tuple[int, int], Tuple[int, int]]]:
+        # (combined steps, wire pair, crossing) of the lowest-latency crossing
+        return min(((steps, pair, point)
+                    for pair, points in self.getCrossings().items()
+                    for point, steps in points.items()), default=None)
+
+# Cells are packed as x * 2**32 + y in one int64, which keeps them unique and
+# ordered as long as |x| and |y| stay below 2**31
+PACK_SHIFT = 32
+PACK_LIMIT = 1 << 31
+
+def pack(x: 'np.ndarray', y: 'np.ndarray') -> 'np.ndarray':
+    import numpy as np
+    return (x.astype(np.int64) << PACK_SHIFT) + y
+
+def unpack(keys: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    y = ((keys + PACK_LIMIT) & ((1 << PACK_SHIFT) - 1)) - PACK_LIMIT
+    return (keys - y) >> PACK_SHIFT, y
+
+class CompactWire:
+    def __init__ (self, route: List[str]):
+        # NumPy is only needed by this wire, so it is not imported with the module
+        import numpy as np
+        
+        # Sorted packed cells, and the step count of the first visit of each
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.first = np.zeros(0, dtype=np.int64)
+        self.x = 0
+        self.y = 0
+        self.steps = 0
+        self.addRoute(route)
+        
+    def __str__(self):
+        return f'There are {self.steps} in this Wire.'
+        
+    def getSize(self) -> int:
+        return self.steps
+        
+    def addRoute(self, route):
+        import numpy as np
+        distances = np.array([int(r[1:]) for r in route], dtype=np.int64)
+        dx = np.array([MOVES[r[0]][0] for r in route], dtype=np.int64)
+        dy = np.array([MOVES[r[0]][1] for r in route], dtype=np.int64)
+        
+        # One entry per unit step, in the order the wire walks them
+        xs = self.x + np.cumsum(np.repeat(dx, distances))
+        ys = self.y + np.cumsum(np.repeat(dy, distances))
+        if xs.size and (np.abs(xs).max() >= PACK_LIMIT or np.abs(ys).max() >= PACK_LIMIT):
+            raise ValueError('Wire leaves the packable coordinate range')
+        steps = self.steps + np.arange(1, xs.size + 1, dtype=np.int64)
+        
+        # np.unique keeps the first occurrence, so earlier visits (including
+        # cells from previous routes, which come first) win
+        keys = np.concatenate((self.keys, pack(xs, ys)))
+        steps = np.concatenate((self.first, steps))
+        self.keys, index = np.unique(keys, return_index=True)
+        self.first = steps[index]
+        
+        if xs.size:
+            self.x, self.y = int(xs[-1]), int(ys[-1])
+        self.steps += xs.size
+    
+    def getNodes(self) -> Set[Tuple[int, int]]:
+        # Built on demand; the wire itself only keeps the packed arrays
+        xs, ys = unpack(self.keys)
+        return set(zip(xs.tolist(), ys.tolist()))
+    
+    def getCollisions(self, other: any) -> Tuple[Set[Tuple[int, int]], Dict[Tuple[int,int],int]]:
+        import numpy as np
+        keys, mine, theirs = np.intersect1d(self.keys, other.keys, assume_unique=True,
+                                            return_indices=True)
+        xs, ys = unpack(keys)
+        points = list(zip(xs.tolist(), ys.tolist()))
+        steps = (self.first[mine] + other.first[theirs]).tolist()
+        
+        return set(points), dict(zip(points, steps))
+
+
 if __name__ == '__main__':
     with open ('day03_input.txt', 'r') as inp:
         w1 = inp.readline().strip().split(',')
         w2 = inp.readline().strip().split(',')
         
-    wire1 = Wire(w1)
-    wire2 = Wire(w2)
+    wire1 = SegmentWire(w1)
+    wire2 = SegmentWire(w2)
     
     collisions, colls_w_steps = wire1.getCollisions(wire2)
     
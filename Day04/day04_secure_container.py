@@ -48,8 +48,10 @@ How many different passwords within the range given in your puzzle input meet
 all of the criteria?
 
 """
-from typing import Set
-from collections import Counter
+from typing import Iterator, Set, Tuple
+from collections import Counter, namedtuple
+from functools import lru_cache
+from itertools import groupby
 
 # This turns out to be slower than match_adjacent_not_group
 # Though, it is more "Pythonic"
@@ -98,7 +100,7 @@ def is_valid(number: int, r1: int, r2: int, strict: bool, length: int = 6) -> bo
     
     return True
     
-def get_all_valid_pwd(begin: int, end: int, strict: bool) -> Set[int]:
+def scan_all_valid_pwd(begin: int, end: int, strict: bool) -> Set[int]:
     valid = set([])
     
     for i in range(begin, end + 1):
@@ -107,16 +109,102 @@ def get_all_valid_pwd(begin: int, end: int, strict: bool) -> Set[int]:
         
     return valid
 
-# Part 1 asserts
-assert is_valid(111111, 100000, 300000, False) == True
-assert is_valid(223450, 100000, 300000, False) == False
-assert is_valid(123789, 100000, 300000, False) == False
-
-# Part 2 asserts
-assert is_valid(112233, 100000, 300000, True) == True
-assert is_valid(123444, 100000, 300000, True) == False
-assert is_valid(111122, 100000, 300000, True) == True
+def nondecreasing(begin: int, end: int, length: int = 6) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+    # Every `length`-digit number in [begin, end] whose digits never decrease,
+    # in ascending order, with its digits. There are only C(length + 8, 8) of
+    # them, and whole branches outside the range are skipped
+    def extend(prefix: int, digits: Tuple[int, ...], low: int):
+        remaining = length - len(digits)
+        if remaining == 0:
+            yield prefix, digits
+            return
+        
+        scale = 10 ** (remaining - 1)
+        ones = (scale - 1) // 9
+        for d in range(low, 10):
+            value = prefix * 10 + d
+            # The smallest completion repeats d, the largest is all nines
+            if value * scale + 9 * ones < begin:
+                continue
+            if value * scale + d * ones > end:
+                break
+            yield from extend(value, digits + (d,), d)
+    
+    # A leading zero would make it a shorter number, so digits start at 1
+    return extend(0, (), 1)
+
+# A password rule over the lengths of the runs of equal digits, as a small
+# automaton: each finished run (its length capped at `cap`) moves `state` on
+# through step(state, run), and accept(state) decides at the end. Both the
+# enumerator and the digit DP below work for any rule written this way.
+RunRule = namedtuple('RunRule', 'cap start step accept')
+
+# Some run of two or more (Part 1)
+HAS_MATCH = RunRule(2, False, lambda found, run: found or run >= 2, lambda found: found)
+
+# Some run of exactly two (Part 2)
+EXACT_PAIR = RunRule(3, False, lambda found, run: found or run == 2, lambda found: found)
+
+def rule_for(strict: bool) -> RunRule:
+    return EXACT_PAIR if strict else HAS_MATCH
+
+def follows_rule(digits: Tuple[int, ...], rule: RunRule) -> bool:
+    state = rule.start
+    for _, run in groupby(digits):
+        state = rule.step(state, min(sum(1 for _ in run), rule.cap))
+    return rule.accept(state)
+
+def get_all_valid_pwd(begin: int, end: int, strict: bool, length: int = 6,
+                      rule: RunRule = None) -> Set[int]:
+    rule = rule or rule_for(strict)
+    return set(number for number, digits in nondecreasing(begin, end, length)
+               if follows_rule(digits, rule))
+
+def count_upto(bound: int, length: int, rule: RunRule) -> int:
+    # Valid `length`-digit numbers <= bound, by digit DP: after the first
+    # position where a number drops below the bound, only (position, last
+    # digit, open run length, rule state) matter for how it can continue
+    if bound < 10 ** (length - 1):
+        return 0
+    bound_digits = [int(d) for d in str(min(bound, 10 ** length - 1))]
+    
+    @lru_cache(maxsize=None)
+    def free(pos: int, last: int, run: int, state) -> int:
+        if pos == length:
+            return 1 if rule.accept(rule.step(state, run)) else 0
+        total = free(pos + 1, last, min(run + 1, rule.cap), state)
+        next_state = rule.step(state, run)
+        for d in range(last + 1, 10):
+            total += free(pos + 1, d, 1, next_state)
+        return total
     
+    def advance(last: int, run: int, state, d: int) -> Tuple[int, object]:
+        if d == last:
+            return min(run + 1, rule.cap), state
+        return 1, (state if last is None else rule.step(state, run))
+    
+    total = 0
+    last, run, state = None, 0, rule.start
+    for pos, limit in enumerate(bound_digits):
+        low = 1 if last is None else last
+        for d in range(low, limit):
+            total += free(pos + 1, d, *advance(last, run, state, d))
+        if limit < low:
+            # The bound itself decreases here, nothing more fits under it
+            return total
+        run, state = advance(last, run, state, limit)
+        last = limit
+    
+    # The bound itself
+    return total + (1 if rule.accept(rule.step(state, run)) else 0)
+
+def count_valid_pwd(begin: int, end: int, strict: bool, length: int = 6,
+                    rule: RunRule = None) -> int:
+    rule = rule or rule_for(strict)
+    if begin > end:
+        return 0
+    return count_upto(end, length, rule) - count_upto(begin - 1, length, rule)
+
 if __name__ == '__main__':
     [low,high] = [int(x) for x in '264793-803935'.split('-')]
     
@@ -40,165 +40,23 @@ by the number of values in that instruction. However, if the instruction modifie
 the instruction pointer, that value is used and the instruction pointer is not
 automatically increased.
 """
-from typing import List, NamedTuple
-from collections import namedtuple
+import os
+import sys
+from typing import List
+from collections import deque
 
-Instruction = namedtuple('Instruction', 'opcode p1_mode p2_mode p3_mode length')
-
-def parse_instruction(inst:int) -> NamedTuple:
-    # Opcode
-    opcode = inst % 100
-    if opcode == 8:
-        print(inst)
-    inst = inst // 100
-    
-    # P1
-    p1_mode = inst % 10
-    inst = inst // 10
-    
-    # P2, if exists
-    if inst > 0:
-        p2_mode = inst % 10
-        inst = inst // 10
-    else:
-        p2_mode = 0
-    
-    # P3, if exists
-    if inst > 0:
-        p3_mode = inst
-    else:
-        p3_mode = 0
-        
-    if (opcode == 1 or opcode == 2 or opcode == 7 or opcode == 8):
-        length = 4
-    elif (opcode == 3 or opcode == 4):
-        length = 2
-    elif (opcode == 5 or opcode == 6):
-        length = 3
-    elif (opcode == 99):
-        length = 0
-    else:
-        raise RuntimeError()
-    
-    return Instruction(opcode, p1_mode, p2_mode, p3_mode, length)
+if __name__ == '__main__':
+    # Run as a script from its day directory: make the shared package importable
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import VM
 
 def run_intcode(prog: List[int], input_value: int) -> List[int]:
-    address = 0
-    p1 = p2 = p3 = 0
-    
-    prog_length = len(prog)
-    instruction = parse_instruction(prog[address])
+    vm = VM(prog, [input_value], deque(maxlen=1))
     
-    while instruction[0] != 99:
-        # print(address, instruction,prog[address:address+4])
-        
-        # Make sure address is not too close to end of program
-        if address + instruction.length >= prog_length:
-            raise RuntimeError(1)
-            break
-        
-        # Opcode
-        opcode = instruction.opcode
-
-        # Add or Multiply
-        if (instruction.opcode == 1 or instruction.opcode == 2 or
-            instruction.opcode == 7 or instruction.opcode == 8):
-            # P1
-            if instruction.p1_mode:
-                p1 = prog[address + 1]
-            else:
-                p1 = prog[prog[address + 1]]
-            # P2
-            if instruction.p2_mode:
-                p2 = prog[address + 2]
-            else:
-                p2 = prog[prog[address + 2]]
-            # P3
-            p3 = prog[address + 3]
-            
-            if p3 > prog_length - 1 and not instruction.p3_mode:
-                raise RuntimeError()
-                break
-        # Input or Output
-        elif (instruction.opcode == 3 or instruction.opcode == 4):
-            # P1
-            p1 = prog[address + 1]
-            
-            if p1 > prog_length - 1 and not instruction.p1_mode:
-                raise RuntimeError()
-                break
-        # Jump-If-False or Jump-If-True
-        elif (instruction.opcode == 5 or instruction.opcode == 6):
-            # P1
-            if instruction.p1_mode:
-                p1 = prog[address + 1]
-            else:
-                p1 = prog[prog[address + 1]]
-            
-            # P2
-            if instruction.p2_mode:
-                p2 = prog[address + 2]
-            else:
-                p2 = prog[prog[address + 2]]
-        
-        # Add
-        if (opcode == 1):
-            prog[p3] = p1 + p2
-        # Multiply
-        elif (opcode == 2):
-            prog[p3] = p1 * p2
-        # Input
-        elif (opcode == 3):
-            prog[p1] = input_value
-        # Output
-        elif (opcode == 4):
-            print(prog[p1])
-        # Jump-If-True
-        elif (opcode == 5):
-            if not (p1 == 0):
-                address = p2
-                # Make sure address is within bounds of program list
-                if address > prog_length - 1 :
-                    raise RuntimeError()
-            
-                instruction = parse_instruction(prog[address])
-                continue
-        # Jump-If-False
-        elif (opcode == 6):
-            if (p1 == 0):
-                address = p2
-                # Make sure address is within bounds of program list
-                if address > prog_length - 1 :
-                    raise RuntimeError()
-            
-                instruction = parse_instruction(prog[address])
-                continue
-        # Less-Than
-        elif (opcode == 7):
-            if (p1 < p2):
-                prog[p3] = 1
-            else:
-                prog[p3] = 0
-        elif (opcode == 8):
-            if (p1 == p2):
-                prog[p3] = 1
-            else:
-                prog[p3] = 0
-        else:
-            raise RuntimeError()
-            break
+    for value in vm.stream():
+        print(value)
     
-        address += instruction.length
-        
-        # Make sure address is within bounds of program list
-        if address > prog_length - 1 :
-            raise RuntimeError()
-        
-        instruction = parse_instruction(prog[address])
-    
-    return prog
-
-assert (parse_instruction(1002) == Instruction(2, 0, 1, 0, 4))
+    return vm.dump()
 
 if __name__ == '__main__':
     with open ('day05_input.txt', 'r') as inp:
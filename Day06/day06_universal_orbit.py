@@ -62,7 +62,11 @@ they are orbiting - not between YOU and SAN.)
 
 """
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
+from array import array
+import mmap
+import numpy as np
+import re
 
 def make_tree(orbits: List[str]) -> Dict[str, str]:
     tree = {}
@@ -73,7 +77,37 @@ def make_tree(orbits: List[str]) -> Dict[str, str]:
     
     return tree
 
-def get_orbit_count(node: str, galaxy: Dict[str, str]) -> int:
+def make_depths(galaxy: Dict[str, str], root: str = 'COM') -> Dict[str, int]:
+    # Orbit count of every body, in one breadth-first pass down from the root,
+    # so each body is visited once however deep the map is. Whatever the root
+    # itself is said to orbit is ignored, as walking stops at the root anyway
+    children = {}
+    for child, parent in galaxy.items():
+        if child != root:
+            children.setdefault(parent, []).append(child)
+    
+    depths = {root: 0}
+    level = [root]
+    count = 0
+    while level:
+        count += 1
+        next_level = []
+        for parent in level:
+            for child in children.get(parent, ()):
+                if child in depths:
+                    continue
+                depths[child] = count
+                next_level.append(child)
+        level = next_level
+    
+    return depths
+
+def get_orbit_count(node: str, galaxy: Dict[str, str],
+                    depths: Dict[str, int] = None) -> int:
+    # With a depth table from make_depths this is a single lookup
+    if depths is not None:
+        return depths[node]
+    
     count = 0
     child = node
     
@@ -83,20 +117,10 @@ def get_orbit_count(node: str, galaxy: Dict[str, str]) -> int:
 
     return count
 
-EX1 = ['COM)B','B)C','C)D','D)E','E)F','B)G','G)H','D)I','E)J','J)K','K)L']
-ex_tree = make_tree(EX1)
-
-assert get_orbit_count('D', ex_tree) == 3
-assert get_orbit_count('L', ex_tree) == 7
-assert get_orbit_count('COM', ex_tree) == 0
-
 def get_total_orbit_count(galaxy: Dict[str, str]) -> int:
-    return sum(get_orbit_count(child, galaxy) for child in galaxy)
-
-assert get_total_orbit_count(ex_tree) == 42
-
-EX2 = ['COM)B','B)C','C)D','D)E','E)F','B)G','G)H','D)I','E)J','J)K','K)L','K)YOU','I)SAN']
-ex_tree2 = make_tree(EX2)
+    depths = make_depths(galaxy)
+    # Bodies that do not lead back to COM raise KeyError, as walking would
+    return sum(depths[child] for child in galaxy)
 
 def get_path_to_root(node: str, galaxy: Dict[str, str]) -> List[str]:
     path = []
@@ -108,9 +132,6 @@ def get_path_to_root(node: str, galaxy: Dict[str, str]) -> List[str]:
     
     return path
 
-assert get_path_to_root('YOU', ex_tree2) == ['K','J','E','D','C','B','COM']
-assert get_path_to_root('SAN', ex_tree2) == ['I','D','C','B','COM']
-
 def get_transfer(node1: str, node2: str, galaxy: Dict[str, str]) -> int:
     p1 = get_path_to_root(node1, galaxy)
     p2 = get_path_to_root(node2, galaxy)
@@ -121,16 +142,328 @@ def get_transfer(node1: str, node2: str, galaxy: Dict[str, str]) -> int:
     
     return len(p1) + len(p2)
 
-assert get_transfer('YOU','SAN', ex_tree2) == 4
+def intern_tree(galaxy: Dict[str, str], root: str = 'COM') -> 'OrbitGraph':
+    # Number every body once, in order of first mention, root first
+    ids = {root: 0}
+    for child, parent in galaxy.items():
+        ids.setdefault(parent, len(ids))
+        ids.setdefault(child, len(ids))
+    
+    parent = np.arange(len(ids), dtype=np.int32)
+    parent[np.fromiter((ids[c] for c in galaxy), np.int32, len(galaxy))] = \
+        np.fromiter((ids[p] for p in galaxy.values()), np.int32, len(galaxy))
+    
+    return OrbitGraph(list(ids), parent, root, ids)
 
-if __name__ == '__main__':
-    with open ('day06_input.txt', 'r') as inp:
-        raw = [line.strip() for line in inp]
+# One `A)B` orbit; names are anything but ')' and whitespace
+ORBIT = re.compile(rb'([^)\s]+)\)([^)\s]+)')
+
+def load_orbit_graph(path: str, root: str = 'COM') -> 'OrbitGraph':
+    # The file is memory-mapped and scanned once: each pair goes straight
+    # into two int32 arrays, so besides the name table memory stays at
+    # 8 bytes per orbit however large the dump is
+    ids = {root.encode(): 0}
+    children, parents = array('i'), array('i')
+    
+    with open(path, 'rb') as inp:
+        if inp.seek(0, 2) == 0:
+            data = b''
+        else:
+            data = mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ)
+        for match in ORBIT.finditer(data):
+            parent, child = match.groups()
+            parents.append(ids.setdefault(parent, len(ids)))
+            children.append(ids.setdefault(child, len(ids)))
+        if data:
+            data.close()
+    
+    # OrbitGraph builds its own str-keyed table; drop the bytes one first
+    names = [name.decode() for name in ids]
+    del ids
+    parent = np.arange(len(names), dtype=np.int32)
+    parent[np.frombuffer(children, dtype=np.int32)] = np.frombuffer(parents, dtype=np.int32)
+    
+    return OrbitGraph(names, parent, root)
+
+# Depth levels with at least this many bodies are summed with np.add.at
+WIDE_LEVEL = 128
+
+class OrbitGraph:
+    def __init__ (self, names: List[str], parent: np.ndarray, root: str = 'COM',
+                  ids: Dict[str, int] = None):
+        # Bodies are dense integer ids; parent[i] is the id body i orbits.
+        # The root, and any body nothing is known to orbit, is its own parent
+        self.names = names
+        self.ids = ids if ids is not None else {name: i for i, name in enumerate(names)}
+        self.root = root
+        self.root_id = self.ids[root]
+        self.parent = np.asarray(parent, dtype=np.int32)
+        self.parent[self.root_id] = self.root_id
+        self.depth = self.makeDepths()
+        self.up = None
+    
+    def __str__(self):
+        return f'There are {len(self.names)} bodies in this graph.'
+    
+    def makeDepths(self) -> np.ndarray:
+        # Pointer jumping: each round every body adds the distance to the
+        # ancestor it points at and then points twice as far up, so the whole
+        # table takes O(log depth) vector passes
+        nodes = np.arange(len(self.parent), dtype=np.int32)
+        jump = self.parent.copy()
+        depth = (jump != nodes).astype(np.int32)
+        
+        for _ in range(len(nodes).bit_length() + 1):
+            ahead = jump[jump]
+            if (ahead == jump).all():
+                break
+            depth += depth[jump]
+            jump = ahead
+        
+        # Bodies that do not lead back to the root raise KeyError, as walking would
+        stray = np.flatnonzero(jump != self.root_id)
+        if stray.size:
+            raise KeyError(self.names[stray[0]])
+        return depth
+    
+    def getLifting(self) -> np.ndarray:
+        # up[k][v] is the 2**k-th ancestor of v, built on first use
+        if self.up is None:
+            levels = max(int(self.depth.max()).bit_length(), 1)
+            self.up = np.empty((levels, len(self.parent)), dtype=np.int32)
+            self.up[0] = self.parent
+            for k in range(1, levels):
+                self.up[k] = self.up[k - 1][self.up[k - 1]]
+        return self.up
+    
+    def getSubtreeSizes(self) -> np.ndarray:
+        # Bodies in each subtree, itself included, accumulated deepest first
+        # along the breadth-first order. A wide level adds its sizes to the
+        # level above in one np.add.at; a run of narrow levels (a long chain)
+        # is summed in one scalar pass, so depth never costs a NumPy call per
+        # level
+        order = np.argsort(self.depth, kind='stable')
+        bounds = np.searchsorted(self.depth[order], np.arange(int(self.depth.max()) + 2))
+        wide = np.diff(bounds) >= WIDE_LEVEL
+        size = np.ones(len(self.parent), dtype=np.int64)
+        position = np.full(len(self.parent), -1, dtype=np.int64)
+        
+        d = len(bounds) - 2
+        while d > 0:
+            if wide[d]:
+                level = order[bounds[d]:bounds[d + 1]]
+                np.add.at(size, self.parent[level], size[level])
+                d -= 1
+                continue
+            
+            top = d
+            while top > 1 and not wide[top - 1]:
+                top -= 1
+            # Where each body's parent sits in the run, or -1 above it
+            run = order[bounds[top]:bounds[d + 1]][::-1]
+            position[run] = np.arange(len(run))
+            parents = self.parent[run]
+            targets = position[parents]
+            position[run] = -1
+            
+            sizes = size[run].tolist()
+            for i, j in enumerate(targets.tolist()):
+                if j >= 0:
+                    sizes[j] += sizes[i]
+            
+            size[run] = sizes
+            above = targets < 0
+            np.add.at(size, parents[above], size[run][above])
+            d = top - 1
+        
+        return size
+    
+    def getAncestors(self, nodes: np.ndarray, steps: np.ndarray) -> np.ndarray:
+        # The steps-th ancestor of every body in nodes, lifting all at once
+        up = self.getLifting()
+        nodes = np.array(nodes, dtype=np.int32)
+        steps = np.asarray(steps)
+        for k in range(len(up)):
+            lift = (steps >> k) & 1 == 1
+            nodes[lift] = up[k][nodes[lift]]
+        return nodes
+    
+    def getCommonAncestors(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        # Lowest common ancestor of every pair a[i], b[i]
+        up, depth = self.getLifting(), self.depth
+        a, b = np.asarray(a, dtype=np.int32), np.asarray(b, dtype=np.int32)
+        deeper = depth[a] >= depth[b]
+        a, b = np.where(deeper, a, b), np.where(deeper, b, a)
+        a = self.getAncestors(a, depth[a] - depth[b])
         
-    orbits = make_tree(raw)
+        for k in range(len(up) - 1, -1, -1):
+            ua, ub = up[k][a], up[k][b]
+            apart = ua != ub
+            a, b = np.where(apart, ua, a), np.where(apart, ub, b)
+        return np.where(a == b, a, up[0][a])
+    
+    def getPath(self, node: int) -> np.ndarray:
+        # Ids from the body's parent up to the root, like get_path_to_root
+        steps = np.arange(1, self.depth[node] + 1)
+        return self.getAncestors(np.full(len(steps), node, dtype=np.int32), steps)
+    
+    def getDistances(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        depth = self.depth.astype(np.int64)
+        return depth[a] + depth[b] - 2 * depth[self.getCommonAncestors(a, b)]
+    
+    def getTransferIds(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        # Same as get_transfer: the distance between the bodies they orbit,
+        # or just the depths when either one is the root
+        a, b = np.asarray(a, dtype=np.int32), np.asarray(b, dtype=np.int32)
+        at_root = (a == self.root_id) | (b == self.root_id)
+        moved = self.getDistances(self.parent[a], self.parent[b])
+        return np.where(at_root, self.depth[a].astype(np.int64) + self.depth[b], moved)
+    
+    # Name-based API, as thin wrappers over the id arrays
+    def getOrbitCount(self, node: str) -> int:
+        return int(self.depth[self.ids[node]])
+    
+    def getTotalOrbitCount(self) -> int:
+        return int(self.depth.sum(dtype=np.int64))
+    
+    def getSubtreeSize(self, node: str) -> int:
+        return int(self.getSubtreeSizes()[self.ids[node]])
+    
+    def getPathToRoot(self, node: str) -> List[str]:
+        return [self.names[i] for i in self.getPath(self.ids[node]).tolist()]
+    
+    def getTransfer(self, node1: str, node2: str) -> int:
+        return self.getTransfers([(node1, node2)])[0]
+    
+    def getTransfers(self, pairs: Iterable[Tuple[str, str]]) -> List[int]:
+        ids = self.ids
+        pairs = np.array([(ids[node1], ids[node2]) for node1, node2 in pairs],
+                         dtype=np.int32).reshape(-1, 2)
+        return self.getTransferIds(pairs[:, 0], pairs[:, 1]).tolist()
+
+class TransferIndex:
+    def __init__ (self, galaxy: Dict[str, str], root: str = 'COM'):
+        # The tables come from an OrbitGraph, copied to lists because single
+        # queries index lists faster than NumPy arrays
+        self.graph = intern_tree(galaxy, root)
+        self.root = root
+        self.ids = self.graph.ids
+        self.names = self.graph.names
+        self.depth = self.graph.depth.tolist()
+        self.up = self.graph.getLifting().tolist()
+    
+    def __str__(self):
+        return f'There are {len(self.names)} bodies in this index.'
+    
+    def getOrbitCount(self, node: str) -> int:
+        return self.depth[self.ids[node]]
+    
+    def getCommonAncestor(self, a: int, b: int) -> int:
+        # Lowest common ancestor of two body ids, in O(log depth)
+        depth, up = self.depth, self.up
+        if depth[a] < depth[b]:
+            a, b = b, a
+        
+        # Lift the deeper body to the other's depth, one set bit at a time
+        diff = depth[a] - depth[b]
+        k = 0
+        while diff:
+            if diff & 1:
+                a = up[k][a]
+            diff >>= 1
+            k += 1
+        if a == b:
+            return a
+        
+        # Then lift both as long as they stay apart
+        for k in range(len(up) - 1, -1, -1):
+            if up[k][a] != up[k][b]:
+                a, b = up[k][a], up[k][b]
+        return up[0][a]
+    
+    def getTransfer(self, node1: str, node2: str) -> int:
+        # Same as get_transfer: the distance between the bodies they orbit
+        a, b = self.ids[node1], self.ids[node2]
+        if a == self.graph.root_id or b == self.graph.root_id:
+            return self.depth[a] + self.depth[b]
+        a, b = self.up[0][a], self.up[0][b]
+        return self.depth[a] + self.depth[b] - 2 * self.depth[self.getCommonAncestor(a, b)]
+    
+    def getTransfers(self, pairs: Iterable[Tuple[str, str]]) -> List[int]:
+        # Batches go through the vectorized lifting on the graph
+        return self.graph.getTransfers(pairs)
+
+class OrbitMap:
+    def __init__ (self, galaxy: Dict[str, str] = None, root: str = 'COM'):
+        # A map that changes body by body and keeps its total orbit count up
+        # to date, so it never has to be recounted from scratch
+        galaxy = galaxy if galaxy is not None else {}
+        self.root = root
+        self.parent = {child: parent for child, parent in galaxy.items() if child != root}
+        self.depth = make_depths(galaxy, root)
+        self.children = {name: set() for name in self.depth}
+        
+        for child, parent in self.parent.items():
+            if child not in self.depth:
+                raise KeyError(child)
+            self.children[parent].add(child)
+        self.total = sum(self.depth.values())
+    
+    def __str__(self):
+        return f'There are {len(self.depth)} bodies in this map.'
+    
+    def getOrbitCount(self, node: str) -> int:
+        return self.depth[node]
+    
+    def getTotalOrbitCount(self) -> int:
+        return self.total
+    
+    def getSubtree(self, node: str) -> List[str]:
+        subtree = [node]
+        for body in subtree:
+            subtree.extend(self.children[body])
+        return subtree
+    
+    def addLeaf(self, node: str, parent: str) -> None:
+        if node in self.depth:
+            raise ValueError(f'{node} is already in the map')
+        depth = self.depth[parent] + 1
+        self.parent[node] = parent
+        self.depth[node] = depth
+        self.children[node] = set()
+        self.children[parent].add(node)
+        self.total += depth
+    
+    def removeLeaf(self, node: str) -> None:
+        if node == self.root or self.children[node]:
+            raise ValueError(f'{node} is not a leaf')
+        self.children[self.parent.pop(node)].remove(node)
+        del self.children[node]
+        self.total -= self.depth.pop(node)
+    
+    def reparent(self, node: str, parent: str) -> None:
+        # Moves node and everything orbiting it: every depth in the subtree
+        # shifts by the same amount, so the total changes by shift * size
+        if node == self.root:
+            raise ValueError(f'{node} is the root')
+        shift = self.depth[parent] + 1 - self.depth[node]
+        subtree = self.getSubtree(node)
+        if parent in subtree:
+            raise ValueError(f'{parent} orbits {node}')
+        
+        for body in subtree:
+            self.depth[body] += shift
+        self.total += shift * len(subtree)
+        
+        self.children[self.parent[node]].remove(node)
+        self.children[parent].add(node)
+        self.parent[node] = parent
+
+if __name__ == '__main__':
+    orbits = load_orbit_graph('day06_input.txt')
     
     # Part 1
-    print(f'Part 1 Output: {get_total_orbit_count(orbits)} total orbits')
+    print(f'Part 1 Output: {orbits.getTotalOrbitCount()} total orbits')
     
     # Part 2
-    print(f'Part 2 Output: {get_transfer("YOU","SAN", orbits)} total tranfers')
+    print(f'Part 2 Output: {orbits.getTransfer("YOU","SAN")} total tranfers')
\ No newline at end of file
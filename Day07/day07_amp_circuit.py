@@ -87,170 +87,31 @@ Try every combination of the new phase settings on the amplifier feedback loop.
 What is the highest signal that can be sent to the thrusters?
 """
 
-from typing import List, NamedTuple, Tuple
-from collections import namedtuple
+import os
+import sys
+from typing import List, Tuple
+from collections import deque
 from itertools import permutations
 
-Instruction = namedtuple('Instruction', 'opcode p1_mode p2_mode p3_mode length')
-
-def parse_instruction(inst:int) -> NamedTuple:
-    # Opcode
-    opcode = inst % 100
-    if opcode == 8:
-        print(inst)
-    inst = inst // 100
-    
-    # P1
-    p1_mode = inst % 10
-    inst = inst // 10
-    
-    # P2, if exists
-    if inst > 0:
-        p2_mode = inst % 10
-        inst = inst // 10
-    else:
-        p2_mode = 0
-    
-    # P3, if exists
-    if inst > 0:
-        p3_mode = inst
-    else:
-        p3_mode = 0
-        
-    if (opcode == 1 or opcode == 2 or opcode == 7 or opcode == 8):
-        length = 4
-    elif (opcode == 3 or opcode == 4):
-        length = 2
-    elif (opcode == 5 or opcode == 6):
-        length = 3
-    elif (opcode == 99):
-        length = 0
-    else:
-        raise RuntimeError(f'Invalid opcode: {opcode}')
-    
-    return Instruction(opcode, p1_mode, p2_mode, p3_mode, length)
-
-def run_intcode(prog: List[int], in1: int, in2: int) -> List[int]:
-    address = 0
-    in1_used = False
-    p1 = p2 = p3 = 0
-    
-    prog_length = len(prog)
-    instruction = parse_instruction(prog[address])
-    
-    while instruction.opcode != 99:
-        # print(address, instruction,prog[address:address+4])
-        
-        # Make sure address is not too close to end of program
-        if address + instruction.length >= prog_length:
-            raise RuntimeError(f'Address (will be) out of program bounds: \
-                                 {address + instruction.length}')
-            break
-
-        # Add or Multiply
-        if (instruction.opcode == 1 or instruction.opcode == 2 or
-            instruction.opcode == 7 or instruction.opcode == 8):
-            # P1
-            if instruction.p1_mode:
-                p1 = prog[address + 1]
-            else:
-                p1 = prog[prog[address + 1]]
-            # P2
-            if instruction.p2_mode:
-                p2 = prog[address + 2]
-            else:
-                p2 = prog[prog[address + 2]]
-            # P3
-            p3 = prog[address + 3]
-            
-            if p3 > prog_length - 1 and not instruction.p3_mode:
-                raise RuntimeError(f'Address (will be) out of program bounds: \
-                                     {address + instruction.length}')
-                break
-        # Input or Output
-        elif (instruction.opcode == 3 or instruction.opcode == 4):
-            # P1
-            p1 = prog[address + 1]
-            
-            if p1 > prog_length - 1 and not instruction.p1_mode:
-                raise RuntimeError(f'Address (will be) out of program bounds: \
-                                     {address + instruction.length}')
-                break
-        # Jump-If-False or Jump-If-True
-        elif (instruction.opcode == 5 or instruction.opcode == 6):
-            # P1
-            if instruction.p1_mode:
-                p1 = prog[address + 1]
-            else:
-                p1 = prog[prog[address + 1]]
-            
-            # P2
-            if instruction.p2_mode:
-                p2 = prog[address + 2]
-            else:
-                p2 = prog[prog[address + 2]]
-        
-        # Add
-        if (instruction.opcode == 1):
-            prog[p3] = p1 + p2
-        # Multiply
-        elif (instruction.opcode == 2):
-            prog[p3] = p1 * p2
-        # Input
-        elif (instruction.opcode == 3):
-            if in1_used:
-                prog[p1] = in2
-            else:
-                prog[p1] = in1
-                in1_used = True
-            # prog[p1] = input_value
-        # Output
-        elif (instruction.opcode == 4):
-            prog_output = prog[p1]
-        # Jump-If-True
-        elif (instruction.opcode == 5):
-            if not (p1 == 0):
-                address = p2
-                # Make sure address is within bounds of program list
-                if address > prog_length - 1 :
-                    raise RuntimeError(f'Address out of program bounds: {address}')
-            
-                instruction = parse_instruction(prog[address])
-                continue
-        # Jump-If-False
-        elif (instruction.opcode == 6):
-            if (p1 == 0):
-                address = p2
-                # Make sure address is within bounds of program list
-                if address > prog_length - 1 :
-                    raise RuntimeError(f'Address out of program bounds: {address}')
-            
-                instruction = parse_instruction(prog[address])
-                continue
-        # Less-Than
-        elif (instruction.opcode == 7):
-            if (p1 < p2):
-                prog[p3] = 1
-            else:
-                prog[p3] = 0
-        elif (instruction.opcode == 8):
-            if (p1 == p2):
-                prog[p3] = 1
-            else:
-                prog[p3] = 0
-        else:
-            raise RuntimeError(f'Invalid opcode: {instruction.opcode}')
-            break
-    
-        address += instruction.length
-        
-        # Make sure address is within bounds of program list
-        if address > prog_length - 1 :
-            raise RuntimeError(f'Address out of program bounds: {address}')
-        
-        instruction = parse_instruction(prog[address])
+if __name__ == '__main__':
+    # Run as a script from its day directory: make the shared package importable
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import VM
+
+class RepeatLast(deque):
+    # Input channel that keeps handing out its last value once the others
+    # are used up, so every input after the first reads in2
+    def popleft(self) -> int:
+        value = super().popleft()
+        if not self:
+            self.append(value)
+        return value
+
+def run_intcode(prog: List[int], in1: int, in2: int) -> int:
+    vm = VM(prog, RepeatLast([in1, in2]))
+    vm.run()
     
-    return prog_output
+    return vm.outputs[-1]
 
 def get_thrust_signal(start: int, seq: Tuple[int], program: List[int]) -> int:
     signal = start
@@ -260,18 +121,6 @@ def get_thrust_signal(start: int, seq: Tuple[int], program: List[int]) -> int:
     
     return signal
 
-p1 = [3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0]
-s1 = (4,3,2,1,0)
-assert get_thrust_signal(0, s1, p1.copy()) == 43210
-
-p2 = [3,23,3,24,1002,24,10,24,1002,23,-1,23,101,5,23,23,1,24,23,23,4,23,99,0,0]
-s2 = (0,1,2,3,4)
-assert get_thrust_signal(0, s2, p2.copy()) == 54321
-
-p3 = [3,31,3,32,1002,32,10,32,1001,31,-2,31,1007,31,0,33,1002,33,7,33,1,33,31,31,1,32,31,31,4,31,99,0,0,0]
-s3 = (1,0,4,3,2)
-assert get_thrust_signal(0, s3, p3.copy()) == 65210
-
 def get_max_thrust(start: int, program: List[int], feedback_mode: bool) -> Tuple[int, List[int]]:
     max_thrust = start
     max_seq = []
@@ -290,15 +139,6 @@ def get_max_thrust(start: int, program: List[int], feedback_mode: bool) -> Tuple
 
     return max_thrust, max_seq
 
-t1, os1 = get_max_thrust(0, p1.copy(), False)
-assert t1 == 43210 and os1 == [4,3,2,1,0]
-
-t2, os2 = get_max_thrust(0, p2.copy(), False)
-assert t2 == 54321 and os2 == [0,1,2,3,4]
-
-t3, os3 = get_max_thrust(0, p3.copy(), False)
-assert t3 == 65210 and os3 == [1,0,4,3,2]
-
 if __name__ == '__main__':
     with open ('day07_input.txt', 'r') as inp:
         initial = [int(x) for x in inp.read().strip().split(',')]
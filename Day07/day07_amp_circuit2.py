@@ -87,182 +87,44 @@ Try every combination of the new phase settings on the amplifier feedback loop.
 What is the highest signal that can be sent to the thrusters?
 """
 
-from typing import List, NamedTuple, Tuple
-from collections import namedtuple, deque
+import asyncio
+import os
+import sys
+from typing import Callable, List, Tuple
+from collections import deque
+from functools import lru_cache, partial
 from itertools import permutations
 
-Instruction = namedtuple('Instruction', 'opcode p1_mode p2_mode p3_mode length')
-
-def parse_instruction(inst:int) -> NamedTuple:
-    # Opcode
-    opcode = inst % 100
-    if opcode == 8:
-        print(inst)
-    inst = inst // 100
-    
-    # P1
-    p1_mode = inst % 10
-    inst = inst // 10
-    
-    # P2, if exists
-    if inst > 0:
-        p2_mode = inst % 10
-        inst = inst // 10
-    else:
-        p2_mode = 0
-    
-    # P3, if exists
-    if inst > 0:
-        p3_mode = inst
-    else:
-        p3_mode = 0
-        
-    if (opcode == 1 or opcode == 2 or opcode == 7 or opcode == 8):
-        length = 4
-    elif (opcode == 3 or opcode == 4):
-        length = 2
-    elif (opcode == 5 or opcode == 6):
-        length = 3
-    elif (opcode == 99):
-        length = 0
-    else:
-        raise RuntimeError(f'Invalid opcode: {opcode}')
-    
-    return Instruction(opcode, p1_mode, p2_mode, p3_mode, length)
+if __name__ == '__main__':
+    # Run as a script from its day directory: make the shared package importable
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode import VM
+from intcode.aio import QUANTUM, drain, run_network
+from intcode.search import search_max
 
 class Amplifier():
     def __init__(self, prog: List[int], phase: int, name: str = 'A') -> None:
-        self.prog = prog
         self.phase = phase
         self.name = name
-        
-        # Initialize some values
-        self.prog_length = len(self.prog)
-        self.in_value = 0
-        self.in1_used = False
-        self.address = 0
-        self.p1 = 0
-        self.p2 = 0
-        self.p3 = 0
+        self.vm = VM(prog, [phase])
+    
+    def fork(self, name: str = None) -> 'Amplifier':
+        # Copy-on-write clone of this Amplifier, paused where it is now
+        clone = Amplifier.__new__(Amplifier)
+        clone.phase = self.phase
+        clone.name = self.name if name is None else name
+        clone.vm = self.vm.fork()
+        return clone
     
     def set_in_value(self, in_value: int) -> None:
-        self.in_value = in_value
+        self.vm.send(in_value)
 
     def run_intcode(self, input_value: int) -> int:
-
-        instruction = parse_instruction(self.prog[self.address])
+        self.vm.send(input_value)
+        self.vm.run()
         
-        while instruction.opcode != 99:
-            # print(address, instruction,prog[address:address+4])
-            
-            # Make sure address is not too close to end of program
-            if self.address + instruction.length >= self.prog_length:
-                raise RuntimeError(f'Address (will be) out of program bounds: \
-                                     {self.address + instruction.length}')
-    
-            # Add or Multiply
-            if (instruction.opcode == 1 or instruction.opcode == 2 or
-                instruction.opcode == 7 or instruction.opcode == 8):
-                # P1
-                if instruction.p1_mode:
-                    self.p1 = self.prog[self.address + 1]
-                else:
-                    self.p1 = self.prog[self.prog[self.address + 1]]
-                # P2
-                if instruction.p2_mode:
-                    self.p2 = self.prog[self.address + 2]
-                else:
-                    self.p2 = self.prog[self.prog[self.address + 2]]
-                # P3
-                self.p3 = self.prog[self.address + 3]
-                
-                if self.p3 > self.prog_length - 1 and not instruction.p3_mode:
-                    raise RuntimeError(f'Address (will be) out of program bounds: \
-                                         {self.address + instruction.length}')
-    
-            # Input or Output
-            elif (instruction.opcode == 3 or instruction.opcode == 4):
-                # P1
-                self.p1 = self.prog[self.address + 1]
-                
-                if self.p1 > self.prog_length - 1 and not instruction.p1_mode:
-                    raise RuntimeError(f'Address (will be) out of program bounds: \
-                                         {self.address + instruction.length}')
-    
-            # Jump-If-False or Jump-If-True
-            elif (instruction.opcode == 5 or instruction.opcode == 6):
-                # P1
-                if instruction.p1_mode:
-                    self.p1 = self.prog[self.address + 1]
-                else:
-                    self.p1 = self.prog[self.prog[self.address + 1]]
-                
-                # P2
-                if instruction.p2_mode:
-                    self.p2 = self.prog[self.address + 2]
-                else:
-                    self.p2 = self.prog[self.prog[self.address + 2]]
-            
-            # Add
-            if (instruction.opcode == 1):
-                self.prog[self.p3] = self.p1 + self.p2
-            # Multiply
-            elif (instruction.opcode == 2):
-                self.prog[self.p3] = self.p1 * self.p2
-            # Input
-            elif (instruction.opcode == 3):
-                if self.in1_used:
-                    self.prog[self.p1] = input_value
-                else:
-                    self.prog[self.p1] = self.phase
-                    self.in1_used = True
-                # prog[p1] = input_value
-            # Output
-            elif (instruction.opcode == 4):
-                self.address += instruction.length
-                return self.prog[self.p1]
-            # Jump-If-True
-            elif (instruction.opcode == 5):
-                if not (self.p1 == 0):
-                    self.address = self.p2
-                    # Make sure address is within bounds of program list
-                    if self.address > self.prog_length - 1 :
-                        raise RuntimeError(f'Address out of program bounds: {self.address}')
-                
-                    instruction = parse_instruction(self.prog[self.address])
-                    continue
-            # Jump-If-False
-            elif (instruction.opcode == 6):
-                if (self.p1 == 0):
-                    self.address = self.p2
-                    # Make sure address is within bounds of program list
-                    if self.address > self.prog_length - 1 :
-                        raise RuntimeError(f'Address out of program bounds: {self.address}')
-                
-                    instruction = parse_instruction(self.prog[self.address])
-                    continue
-            # Less-Than
-            elif (instruction.opcode == 7):
-                if (self.p1 < self.p2):
-                    self.prog[self.p3] = 1
-                else:
-                    self.prog[self.p3] = 0
-            elif (instruction.opcode == 8):
-                if (self.p1 == self.p2):
-                    self.prog[self.p3] = 1
-                else:
-                    self.prog[self.p3] = 0
-            else:
-                raise RuntimeError(f'Invalid opcode: {instruction.opcode}')
-                break
-        
-            self.address += instruction.length
-            
-            # Make sure address is within bounds of program list
-            if self.address > self.prog_length - 1 :
-                raise RuntimeError(f'Address out of program bounds: {self.address}')
-            
-            instruction = parse_instruction(self.prog[self.address])
+        if self.vm.outputs:
+            return self.vm.outputs.popleft()
         
         # Program halted at opcode == 99
         return -99
@@ -276,8 +138,8 @@ def get_thrust_signal(start: int, seq: Tuple[int], program: List[int],
     
     # Initialize all five Amplifiers
     for i, phase in enumerate(seq):
-        # signal = run_intcode(program.copy(), phase, signal)
-        amps.append(Amplifier(program.copy(), phase, names[i]))
+        # Each Amplifier's VM loads its own copy of the program
+        amps.append(Amplifier(program, phase, names[i]))
     
     if feedback_mode:
         while halt_count < len(seq):
@@ -296,19 +158,31 @@ def get_thrust_signal(start: int, seq: Tuple[int], program: List[int],
 
     return thrust
 
-p1 = [3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0]
-s1 = (4,3,2,1,0)
-assert get_thrust_signal(0, s1, p1.copy(), False) == 43210
-
-p2 = [3,23,3,24,1002,24,10,24,1002,23,-1,23,101,5,23,23,1,24,23,23,4,23,99,0,0]
-s2 = (0,1,2,3,4)
-assert get_thrust_signal(0, s2, p2.copy(), False) == 54321
+def make_chain_signal(program: List[int], cache_size: int) -> Callable:
+    # One Amplifier per phase, run up to the point where it waits for its
+    # signal; every evaluation forks from it instead of reloading the program
+    primed = {}
+    
+    # Signal out of the amplifiers in `prefix`, cached by (prefix, signal) so
+    # permutations sharing a prefix only run it once
+    @lru_cache(maxsize=cache_size)
+    def chain_signal(prefix: Tuple[int], signal: int) -> int:
+        if not prefix:
+            return signal
+        phase = prefix[-1]
+        if phase not in primed:
+            primed[phase] = Amplifier(program, phase)
+            primed[phase].vm.run()
+        return primed[phase].fork().run_intcode(chain_signal(prefix[:-1], signal))
+    
+    return chain_signal
 
-p3 = [3,31,3,32,1002,32,10,32,1001,31,-2,31,1007,31,0,33,1002,33,7,33,1,33,31,31,1,32,31,31,4,31,99,0,0,0]
-s3 = (1,0,4,3,2)
-assert get_thrust_signal(0, s3, p3.copy(), False) == 65210
+def score_phases(start: int, feedback_mode: bool, program: List[int],
+                 seq: Tuple[int]) -> int:
+    return get_thrust_signal(start, seq, program, feedback_mode)
 
-def get_max_thrust(start: int, program: List[int], feedback_mode: bool) -> Tuple[int, List[int]]:
+def get_max_thrust(start: int, program: List[int], feedback_mode: bool,
+                   workers: int = 1, cache_size: int = 1024) -> Tuple[int, List[int]]:
     max_thrust = start
     max_seq = []
     
@@ -316,23 +190,95 @@ def get_max_thrust(start: int, program: List[int], feedback_mode: bool) -> Tuple
         my_range = range(5,10)
     else:
         my_range = range(0,5)
+    
+    # workers=None uses one process per core
+    if workers != 1:
+        this_thrust, perm = search_max(partial(score_phases, start, feedback_mode),
+                                       permutations(my_range), program, workers)
+        if this_thrust is not None and this_thrust > max_thrust:
+            max_thrust = this_thrust
+            max_seq = [item for item in perm]
+        return max_thrust, max_seq
+    
+    # Without feedback each amplifier only depends on the ones before it
+    if not feedback_mode:
+        chain_signal = make_chain_signal(program, cache_size)
         
     for perm in permutations(my_range):
-        this_thrust = get_thrust_signal(start, perm, program.copy(), feedback_mode)
+        if feedback_mode:
+            this_thrust = get_thrust_signal(start, perm, program, feedback_mode)
+        else:
+            this_thrust = chain_signal(perm, start)
         if this_thrust > max_thrust:
             max_thrust = this_thrust
             max_seq = [item for item in perm]
 
     return max_thrust, max_seq
 
-t1, os1 = get_max_thrust(0, p1.copy(), False)
-assert t1 == 43210 and os1 == [4,3,2,1,0]
+def get_max_thrust_batch(start: int, program: List[int]) -> Tuple[int, List[int]]:
+    # NumPy is only needed here, so it is not imported with the module
+    from intcode.batch import run_batch
+    
+    max_thrust = start
+    max_seq = []
+    my_range = range(0,5)
+    
+    # Run every amplifier at the same position in the chain as one lockstep
+    # batch: all (prefix + phase, signal) pairs for that position together
+    signals = {(): start}
+    for _ in my_range:
+        pending = [(prefix + (phase,), signal) for prefix, signal in signals.items()
+                   for phase in my_range if phase not in prefix]
+        vms = run_batch(program, inputs=[[prefix[-1], signal] for prefix, signal in pending])
+        signals = {prefix: vm.outputs[-1] for (prefix, _), vm in zip(pending, vms)}
+    
+    for perm in permutations(my_range):
+        if signals[perm] > max_thrust:
+            max_thrust = signals[perm]
+            max_seq = [item for item in perm]
+    
+    return max_thrust, max_seq
 
-t2, os2 = get_max_thrust(0, p2.copy(), False)
-assert t2 == 54321 and os2 == [0,1,2,3,4]
+async def get_network_thrust(start: int, seq: Tuple[int], program: List[int],
+                             feedback_mode: bool, quantum: int = QUANTUM) -> int:
+    # One VM task per amplifier, chained A -> B -> ... -> E (-> A)
+    vms = [VM(program, [phase]) for phase in seq]
+    vms[0].send(start)
+    
+    n = len(vms)
+    thrusters = asyncio.Queue()
+    edges = [(i, i + 1) for i in range(n - 1)] + [(n - 1, thrusters)]
+    if feedback_mode:
+        edges.append((n - 1, 0))
+    
+    await run_network(vms, edges, quantum)
+    
+    return drain(thrusters)[-1]
 
-t3, os3 = get_max_thrust(0, p3.copy(), False)
-assert t3 == 65210 and os3 == [1,0,4,3,2]
+def get_max_thrust_network(start: int, program: List[int], feedback_mode: bool,
+                           quantum: int = QUANTUM) -> Tuple[int, List[int]]:
+    max_thrust = start
+    max_seq = []
+    
+    if feedback_mode:
+        my_range = range(5,10)
+    else:
+        my_range = range(0,5)
+    
+    perms = list(permutations(my_range))
+    
+    # Every permutation is an independent network; run them all in one loop
+    async def search() -> List[int]:
+        return await asyncio.gather(*(get_network_thrust(start, perm, program,
+                                                         feedback_mode, quantum)
+                                      for perm in perms))
+    
+    for perm, this_thrust in zip(perms, asyncio.run(search())):
+        if this_thrust > max_thrust:
+            max_thrust = this_thrust
+            max_seq = [item for item in perm]
+    
+    return max_thrust, max_seq
 
 if __name__ == '__main__':
     with open ('day07_input.txt', 'r') as inp:
@@ -341,9 +287,9 @@ if __name__ == '__main__':
     INPUT = 0
         
     # Part 1
-    thrust1, m_seq1 = get_max_thrust(INPUT, initial.copy(), False)
+    thrust1, m_seq1 = get_max_thrust(INPUT, initial, False)
     print(f'Part 1 Output: The max thrust is {thrust1}.')
     
-    # Part 2
-    thrust2, m_seq2 = get_max_thrust(INPUT, initial.copy(), True)
+    # Part 2: 120 phase orders are quicker serially than through a process pool
+    thrust2, m_seq2 = get_max_thrust(INPUT, initial, True)
     print(f'Part 2 Output: The max thrust is {thrust2}.')
\ No newline at end of file
@@ -47,13 +47,13 @@ def make_image_layers(raw_data: List[int], w: int, h: int) -> 'np.ndarray':
 
 def get_part1(input_image: 'np.ndarray') -> int:
     # Get the zero-count per layer
-    zero_counts_by_layer = np.count_nonzero(image == 0, axis=(1,2))
+    zero_counts_by_layer = np.count_nonzero(input_image == 0, axis=(1,2))
     # Get the minimum amount of zeros
     min_zeros = np.amin(zero_counts_by_layer)
     # Get the index of the layer with the minimum amount of zeros
     layer = np.where(zero_counts_by_layer == min_zeros)[0][0]
     # Get the layer with the minimum amount of zeros
-    min_zeros_layer = image[layer,:,:]
+    min_zeros_layer = input_image[layer,:,:]
     # Get the count of ones in the layer with the min zeros
     ones = np.count_nonzero(min_zeros_layer == 1)
     # Get the count of twos in the layer with the min zeros
@@ -69,7 +69,7 @@ def get_final_image(input_image: 'np.ndarray') -> 'np.ndarray':
     for h in range(height):
         for w in range(width):
             for l in range(layers):
-                pixel = image[l, h, w]
+                pixel = input_image[l, h, w]
                 if pixel == 2:
                     continue
                 else:
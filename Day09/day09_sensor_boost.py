@@ -77,45 +77,15 @@ Run the BOOST program in sensor boost mode. What are the coordinates of the
 distress signal?
 """
 
-from typing import List, NamedTuple, Dict
-from collections import namedtuple, defaultdict
+import os
+import sys
+from typing import List, Dict
+from collections import deque
 
-Instruction = namedtuple('Instruction', 'opcode p1_mode p2_mode p3_mode length')
-
-def parse_instruction(inst:int) -> NamedTuple:
-    # Opcode
-    opcode = inst % 100
-    inst = inst // 100
-    
-    # P1
-    p1_mode = inst % 10
-    inst = inst // 10
-    
-    # P2, if exists
-    if inst > 0:
-        p2_mode = inst % 10
-        inst = inst // 10
-    else:
-        p2_mode = 0
-    
-    # P3, if exists
-    if inst > 0:
-        p3_mode = inst
-    else:
-        p3_mode = 0
-        
-    if (opcode == 1 or opcode == 2 or opcode == 7 or opcode == 8):
-        length = 4
-    elif (opcode == 3 or opcode == 4 or opcode == 9):
-        length = 2
-    elif (opcode == 5 or opcode == 6):
-        length = 3
-    elif (opcode == 99):
-        length = 0
-    else:
-        raise ValueError(f'Invalid opcode: {opcode}')
-    
-    return Instruction(opcode, p1_mode, p2_mode, p3_mode, length)
+if __name__ == '__main__':
+    # Run as a script from its day directory: make the shared package importable
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from intcode.jit import JITVM
 
 def dict_to_list(mydict: Dict[int, int]) -> List[int]:
     temp = []
@@ -125,165 +95,16 @@ def dict_to_list(mydict: Dict[int, int]) -> List[int]:
     
     return temp
 
-def run_intcode(program: List[int], input_value: int) -> List[int]:
-    address = 0
-    # in1_used = False
-    relative_base = 0
-    
-    prog = defaultdict(int)
-    prog.update({i: value for i, value in enumerate(program)})
-    
-    prog_length = len(prog)
-    instruction = parse_instruction(prog[address])
-    
-    while instruction.opcode != 99:
-        p1 = p2 = p3 = None
-        
-        # myprog = dict_to_list(prog)
-        # print(address, instruction, relative_base, myprog[:16])
-        # if (len(myprog) > 100):
-        #      print(myprog[100:102])
-        # print(address, instruction, relative_base, prog[:9])
-        
-        # Add or Multiply or Less-Than or Equals
-        if (instruction.opcode == 1 or instruction.opcode == 2 or
-            instruction.opcode == 7 or instruction.opcode == 8):
-            # P1
-            p1 = prog[address + 1]
-
-            # P2
-            p2 = prog[address + 2]
-
-            # P3
-            p3 = prog[address + 3]
-
-        # Input or Output or Adjust-Relative-Base
-        elif (instruction.opcode == 3 or instruction.opcode == 4 or
-              instruction.opcode == 9):
-            # P1
-            p1 = prog[address + 1]
-            
-        # Jump-If-False or Jump-If-True
-        elif (instruction.opcode == 5 or instruction.opcode == 6):
-            # P1
-            p1 = prog[address + 1]
-            
-            # P2
-            p2 = prog[address + 2]
-
-        # Set args[1,2,3] by parameter modes
-        if not p1 == None:
-            if (instruction.length > 2):
-                if (instruction.p1_mode == 2):
-                    arg1 = prog[relative_base + p1]
-                elif (instruction.p1_mode == 1):
-                    arg1 = p1
-                elif (instruction.p1_mode == 0):
-                    arg1 = prog[p1]
-                else:
-                    raise ValueError(f'Invalid P1 mode: {instruction.p1_mode}')
-            else:
-                if (instruction.p1_mode == 2):
-                    arg1 = relative_base + p1
-                elif (instruction.p1_mode == 1):
-                    arg1 = address + 1
-                elif (instruction.p1_mode == 0):
-                    arg1 = p1
-                else:
-                    raise ValueError(f'Invalid P1 mode: {instruction.p1_mode}') 
-        if not p2 == None:
-            if (instruction.length > 3):
-                if (instruction.p2_mode == 2):
-                    arg2 = prog[relative_base + p2]
-                elif (instruction.p2_mode == 1):
-                    arg2 = p2
-                elif (instruction.p2_mode == 0):
-                    arg2 = prog[p2]
-                else:
-                    raise ValueError(f'Invalid P2 mode: {instruction.p2_mode}')
-            else:
-                if (instruction.p2_mode == 2):
-                    arg2 = relative_base + p2
-                elif (instruction.p2_mode == 1):
-                    arg2 = address + 2
-                elif (instruction.p2_mode == 0):
-                    arg2 = p2
-                else:
-                    raise ValueError(f'Invalid P2 mode: {instruction.p2_mode}') 
-        if not p3 == None:
-            if (instruction.p3_mode == 2):
-                arg3 = relative_base + p3
-            elif (instruction.p3_mode == 1):
-                arg3 = address + 3
-            elif (instruction.p3_mode == 0):
-                arg3 = p3
-            else:
-                raise ValueError(f'Invalid P3 mode: {instruction.p3_mode}')        
-        
-        # Add
-        if (instruction.opcode == 1):
-            prog[arg3] = arg1 + arg2
-
-        # Multiply
-        elif (instruction.opcode == 2):
-            prog[arg3] = arg1 * arg2
-
-        # Input
-        elif (instruction.opcode == 3):
-            prog[arg1] = input_value
-
-        # Output
-        elif (instruction.opcode == 4):
-            prog_output = prog[arg1]
-            # print(f'  OUTPUT --> {prog_output}')
-
-        # Jump-If-True
-        elif (instruction.opcode == 5):
-            if not (arg1 == 0):
-                address = prog[arg2]
-            
-                instruction = parse_instruction(prog[address])
-                continue
-
-        # Jump-If-False
-        elif (instruction.opcode == 6):
-            if (arg1 == 0):
-                address = prog[arg2]
-
-                instruction = parse_instruction(prog[address])
-                continue
-
-        # Less-Than
-        elif (instruction.opcode == 7):
-            if (arg1 < arg2):
-                prog[arg3] = 1
-            else:
-                prog[arg3] = 0
-
-        # Equals
-        elif (instruction.opcode == 8):
-            if (arg1 == arg2):
-                prog[arg3] = 1
-            else:
-                prog[arg3] = 0
-
-        # Adjust-Relative-Base
-        elif (instruction.opcode == 9):
-                relative_base += prog[arg1]
-
-        else:
-            raise ValueError(f'Invalid opcode: {instruction.opcode}')
+def run_intcode(program: List[int], input_value: int) -> int:
+    prog_output = None
     
-        address += instruction.length
-        
-        instruction = parse_instruction(prog[address])
+    # Only the final output is kept, so consume them as they are produced
+    vm = JITVM(program, [input_value], deque(maxlen=1))
+    for prog_output in vm.stream():
+        pass
     
     return prog_output
 
-# run_intcode([109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99], 0)
-# assert len(str((run_intcode([1102,34915192,34915192,7,4,7,99,0], 0)))) == 16
-# assert (run_intcode([104,1125899906842624,99],0) == 1125899906842624)
-
 if __name__ == '__main__':
     with open ('day09_input.txt', 'r') as inp:
         initial = [int(i) for i in inp.read().strip().split(',')]
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the Advent of Code, 2019 solutions.
+
+Every day's entry point is timed against its shipped input and against
+synthetic, scaled-up inputs generated from a fixed seed. Each case is set up
+outside the timed region and reported as the best of `--repeat` runs, per
+call. Importing each day module is timed as well.
+
+Results are written to a JSON file (bench/results.json by default). If that
+file already exists, the new timings are compared against it first and every
+case that got slower by more than `--threshold` (a fraction, default 0.25) is
+flagged as a regression; the exit status is then 1.
+
+    python bench/benchmark.py [--scale 1.0] [--repeat 3] [--only day03]
+                              [--threshold 0.25] [--results FILE] [--no-save]
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RESULTS = os.path.join(ROOT, 'bench', 'results.json')
+
+# Shortest time (seconds) a timed run may take; faster cases are looped
+MIN_TIME = 0.05
+
+DAYS = ['Day01', 'Day02', 'Day03', 'Day04', 'Day05', 'Day06', 'Day07', 'Day08', 'Day09']
+sys.path.append(ROOT)
+for day in DAYS:
+    sys.path.append(os.path.join(ROOT, day))
+
+# A case is (name, setup); setup() returns the zero-argument callable to time
+Case = Tuple[str, Callable[[], Callable[[], object]]]
+
+def read_input(day: str, name: str) -> str:
+    with open(os.path.join(ROOT, day, name), 'r') as inp:
+        return inp.read()
+
+def read_program(day: str, name: str) -> List[int]:
+    return [int(i) for i in read_input(day, name).strip().split(',')]
+
+def random_route(rng: random.Random, segments: int, longest: int) -> List[str]:
+    route = []
+    last = None
+
+    for _ in range(segments):
+        # Never double back over the previous segment
+        direction = rng.choice([d for d in 'RULD' if d != last])
+        route.append(f'{direction}{rng.randint(1, longest)}')
+        last = {'R': 'L', 'L': 'R', 'U': 'D', 'D': 'U'}[direction]
+
+    return route
+
+def random_orbits(rng: random.Random, bodies: int) -> List[str]:
+    names = ['COM'] + [f'B{i}' for i in range(1, bodies)]
+    return [f'{names[rng.randrange(i)]}){names[i]}' for i in range(1, bodies)]
+
+def chain_orbits(bodies: int) -> List[str]:
+    names = ['COM'] + [f'B{i}' for i in range(1, bodies)]
+    return [f'{names[i - 1]}){names[i]}' for i in range(1, bodies)]
+
+def affine_program(rng: random.Random, instructions: int) -> List[int]:
+    # Same shape as the Day 2 program: noun + verb, then a long chain of adds
+    # and multiplies by constants stored after the halt
+    prog = [1, 0, 0, 3, 1, 1, 2, 3]
+    ops = []
+    for i in range(instructions):
+        ops.append((2, 2) if i % 16 == 15 else (1, rng.randint(1, 9)))
+
+    constants = len(prog) + 4 * len(ops) + 4 + 1
+    for k, (opcode, _) in enumerate(ops):
+        prog += [opcode, 3, constants + k, 3]
+    prog += [1, 3, constants + len(ops), 0, 99]
+    prog += [value for _, value in ops] + [0]
+
+    return prog
+
+def countdown_program() -> List[int]:
+    # in [100]; loop: [100] -= 1 while [100] != 0; out [100]; halt
+    return [3, 100, 1001, 100, -1, 100, 1005, 100, 2, 4, 100, 99]
+
+def amplifier_program(rounds: int) -> List[int]:
+    # in phase; in signal; signal += phase, `rounds` times; out signal; halt
+    prog = [3, 50, 3, 51, 1, 51, 50, 51, 1001, 52, -1, 52, 1005, 52, 4, 4, 51, 99]
+    prog += [0] * (50 - len(prog))
+    return prog + [0, 0, rounds]
+
+def make_cases(scale: float, workdir: str) -> List[Case]:
+    # Cases that need files write them into workdir, and only when selected
+    def n(size: int) -> int:
+        return max(1, int(size * scale))
+
+    rng = random.Random(2019)
+    cases = []
+
+    # Day 1
+    day01 = importlib.import_module('day01_rocket_equation')
+    masses = [int(line) for line in read_input('Day01', 'day01_input.txt').split()]
+    big_masses = [rng.randint(10000, 10 ** 9) for _ in range(n(200000))]
+    for name, calc in [('fuel', day01.calculate_fuel),
+                       ('fuel_recursive', day01.calculate_fuel_recursive)]:
+        cases.append((f'day01.{name}.shipped',
+                      lambda calc=calc: lambda: day01.calculate_total_fuel(calc, masses)))
+        cases.append((f'day01.{name}.synthetic',
+                      lambda calc=calc: lambda: day01.calculate_total_fuel(calc, big_masses)))
+
+    # Day 2
+    day02 = importlib.import_module('day02_program_alarm')
+    alarm = read_program('Day02', 'day02_input.txt')
+    cases.append(('day02.find_output.shipped',
+                  lambda: lambda: day02.find_output(alarm, day02.OUTPUT)))
+    affine = affine_program(rng, n(2000))
+    affine_match = day02.get_output(affine, 37, 58)
+    cases.append(('day02.find_output.synthetic',
+                  lambda: lambda: day02.find_output(affine, affine_match)))
+
+    # Day 3: building the wires is part of the cost being measured
+    day03 = importlib.import_module('day03_crossed_wires')
+    w1, w2 = [line.strip().split(',')
+              for line in read_input('Day03', 'day03_input.txt').split()]
+    r1 = random_route(rng, n(400), 1000)
+    r2 = random_route(rng, n(400), 1000)
+    for label, a, b in [('shipped', w1, w2), ('synthetic', r1, r2)]:
+        cases.append((f'day03.getCollisions.{label}',
+                      lambda a=a, b=b: lambda: day03.Wire(a).getCollisions(day03.Wire(b))))
+        cases.append((f'day03.CompactWire.getCollisions.{label}',
+                      lambda a=a, b=b: lambda: day03.CompactWire(a).getCollisions(day03.CompactWire(b))))
+    # Segment wires only pay for the number of turns, so they get long routes
+    l1 = random_route(rng, n(5000), 1000000)
+    l2 = random_route(rng, n(5000), 1000000)
+    for label, a, b in [('shipped', w1, w2), ('synthetic', r1, r2), ('synthetic_long', l1, l2)]:
+        cases.append((f'day03.SegmentWire.getCollisions.{label}',
+                      lambda a=a, b=b: lambda: day03.SegmentWire(a).getCollisions(day03.SegmentWire(b))))
+    many = [random_route(rng, 200, 1000) for _ in range(n(100))]
+    cases.append(('day03.CollisionIndex.getCrossings.synthetic',
+                  lambda: lambda: day03.CollisionIndex([day03.SegmentWire(r) for r in many]).getCrossings()))
+
+    # Day 4
+    day04 = importlib.import_module('day04_secure_container')
+    for strict in (False, True):
+        cases.append((f'day04.get_all_valid_pwd.shipped.strict={strict}',
+                      lambda strict=strict: lambda: day04.get_all_valid_pwd(264793, 803935, strict)))
+    cases.append(('day04.get_all_valid_pwd.synthetic',
+                  lambda: lambda: day04.get_all_valid_pwd(100000, min(999999, 100000 + n(899999)), True)))
+    for strict in (False, True):
+        cases.append((f'day04.scan_all_valid_pwd.shipped.strict={strict}',
+                      lambda strict=strict: lambda: day04.scan_all_valid_pwd(264793, 803935, strict)))
+    cases.append(('day04.count_valid_pwd.synthetic_12_digits',
+                  lambda: lambda: day04.count_valid_pwd(10 ** 11, 10 ** 11 + n(10 ** 11), True, 12)))
+    cases.append(('day04.count_valid_pwd.synthetic_30_digits',
+                  lambda: lambda: day04.count_valid_pwd(10 ** 29, 10 ** 29 + n(10 ** 29), True, 30)))
+
+    # Day 6
+    day06 = importlib.import_module('day06_universal_orbit')
+    shipped_map = day06.make_tree(read_input('Day06', 'day06_input.txt').split())
+    wide_map = day06.make_tree(random_orbits(rng, n(100000)))
+    deep_map = day06.make_tree(chain_orbits(n(3000)))
+    for label, galaxy in [('shipped', shipped_map), ('synthetic_wide', wide_map),
+                          ('synthetic_chain', deep_map)]:
+        cases.append((f'day06.get_total_orbit_count.{label}',
+                      lambda galaxy=galaxy: lambda: day06.get_total_orbit_count(galaxy)))
+    cases.append(('day06.get_transfer.shipped',
+                  lambda: lambda: day06.get_transfer('YOU', 'SAN', shipped_map)))
+    cases.append(('day06.TransferIndex.getTransfer.shipped',
+                  lambda: lambda: day06.TransferIndex(shipped_map).getTransfer('YOU', 'SAN')))
+    bodies = list(wide_map)
+    pairs = [(rng.choice(bodies), rng.choice(bodies)) for _ in range(n(10000))]
+    wide_index = day06.TransferIndex(wide_map)
+    cases.append(('day06.TransferIndex.getTransfers.synthetic_wide',
+                  lambda: lambda: wide_index.getTransfers(pairs)))
+    for label, galaxy in [('synthetic_wide', wide_map), ('synthetic_chain', deep_map)]:
+        cases.append((f'day06.intern_tree.{label}',
+                      lambda galaxy=galaxy: lambda: day06.intern_tree(galaxy)))
+    cases.append(('day06.load_orbit_graph.shipped',
+                  lambda: lambda: day06.load_orbit_graph(os.path.join(ROOT, 'Day06',
+                                                                      'day06_input.txt'))))
+
+    def load_wide() -> Callable[[], object]:
+        path = os.path.join(workdir, 'orbits.txt')
+        with open(path, 'w') as out:
+            out.write('\n'.join(f'{parent}){child}' for child, parent in wide_map.items()))
+        return lambda: day06.load_orbit_graph(path)
+
+    cases.append(('day06.load_orbit_graph.synthetic_wide', load_wide))
+    wide_graph = day06.intern_tree(wide_map)
+    cases.append(('day06.OrbitGraph.getTotalOrbitCount.synthetic_wide',
+                  lambda: lambda: wide_graph.getTotalOrbitCount()))
+    cases.append(('day06.OrbitGraph.getSubtreeSizes.synthetic_wide',
+                  lambda: lambda: wide_graph.getSubtreeSizes()))
+    deep_graph = day06.intern_tree(deep_map)
+    cases.append(('day06.OrbitGraph.getSubtreeSizes.synthetic_chain',
+                  lambda: lambda: deep_graph.getSubtreeSizes()))
+    cases.append(('day06.OrbitGraph.getTransfers.synthetic_wide',
+                  lambda: lambda: wide_graph.getTransfers(pairs)))
+    wide_orbits = day06.OrbitMap(wide_map)
+    mover = max(wide_map, key=wide_orbits.getOrbitCount)
+
+    def churn() -> int:
+        # One of each update, leaving the map as it was
+        wide_orbits.addLeaf('NEW', 'COM')
+        wide_orbits.removeLeaf('NEW')
+        home = wide_orbits.parent[mover]
+        wide_orbits.reparent(mover, 'COM')
+        wide_orbits.reparent(mover, home)
+        return wide_orbits.getTotalOrbitCount()
+
+    cases.append(('day06.OrbitMap.updates.synthetic_wide', lambda: churn))
+
+    # Day 7
+    day07 = importlib.import_module('day07_amp_circuit2')
+    amp = read_program('Day07', 'day07_input.txt')
+    for feedback in (False, True):
+        cases.append((f'day07.get_max_thrust.shipped.feedback={feedback}',
+                      lambda feedback=feedback: lambda: day07.get_max_thrust(0, amp, feedback)))
+    slow_amp = amplifier_program(n(500))
+    cases.append(('day07.get_max_thrust.synthetic',
+                  lambda: lambda: day07.get_max_thrust(0, slow_amp, False)))
+
+    # Day 8
+    day08 = importlib.import_module('day08_image_format')
+    pixels = [int(p) for p in read_input('Day08', 'day08_input.txt').strip()]
+    image = day08.make_image_layers(pixels, 25, 6)
+    # Mostly transparent, so every pixel looks through many layers
+    noise = np.random.default_rng(2019).choice(3, size=n(200) * 60 * 100,
+                                               p=[0.05, 0.05, 0.9])
+    # ... down to an opaque bottom layer
+    noise[-60 * 100:] %= 2
+    big_image = day08.make_image_layers(noise.tolist(), 100, 60)
+    for label, layers in [('shipped', image), ('synthetic', big_image)]:
+        cases.append((f'day08.get_final_image.{label}',
+                      lambda layers=layers: lambda: day08.get_final_image(layers)))
+
+    # Day 9
+    day09 = importlib.import_module('day09_sensor_boost')
+    boost = read_program('Day09', 'day09_input.txt')
+    for mode in (1, 2):
+        cases.append((f'day09.run_intcode.shipped.input={mode}',
+                      lambda mode=mode: lambda: day09.run_intcode(boost, mode)))
+    countdown = countdown_program()
+    cases.append(('day09.run_intcode.synthetic',
+                  lambda: lambda: day09.run_intcode(countdown, n(300000))))
+
+    # Importing a day module as a library, in a fresh interpreter; the
+    # interpreter start-up itself is timed as import.python for reference
+    paths = [ROOT] + [os.path.join(ROOT, day) for day in DAYS]
+    modules = ['sys'] + sorted(f[:-3] for day in DAYS
+                               for f in os.listdir(os.path.join(ROOT, day))
+                               if f.endswith('.py'))
+    for module in modules:
+        code = f'import sys; sys.path[:0] = {paths!r}; import {module}'
+        name = 'python' if module == 'sys' else module
+        cases.append((f'import.{name}',
+                      lambda code=code: lambda: subprocess.run([sys.executable, '-c', code],
+                                                               check=True)))
+
+    return cases
+
+def time_case(func: Callable[[], object], repeat: int,
+              min_time: float = MIN_TIME) -> float:
+    best = None
+
+    for _ in range(repeat):
+        # Fast cases are called repeatedly so the clock resolution and timer
+        # overhead do not dominate
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        if best is None or elapsed / calls < best:
+            best = elapsed / calls
+
+    return best
+
+def load_results(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as inp:
+        return json.load(inp)
+
+def compare(timings: Dict[str, float], previous: Optional[Dict],
+            threshold: float) -> List[str]:
+    old = previous['timings'] if previous else {}
+    regressions = []
+
+    for name, seconds in timings.items():
+        line = f'{name:<52} {seconds * 1000:10.2f} ms'
+        if name in old and old[name] > 0:
+            ratio = seconds / old[name]
+            line += f'  {ratio:6.2f}x'
+            if ratio > 1 + threshold:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Time every day\'s entry points.')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='size factor for the synthetic inputs')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per case; the best one counts')
+    parser.add_argument('--only', default='',
+                        help='only run cases whose name contains this')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='slowdown (as a fraction) reported as a regression')
+    parser.add_argument('--results', default=RESULTS,
+                        help='results file to compare against and update')
+    parser.add_argument('--no-save', action='store_true',
+                        help='compare only, keep the previous results')
+    args = parser.parse_args(argv)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup in make_cases(args.scale, workdir):
+            if args.only in name:
+                timings[name] = time_case(setup(), args.repeat)
+
+    previous = load_results(args.results)
+    if previous and previous.get('scale') != args.scale:
+        print(f'Previous run used scale {previous.get("scale")}, not comparing.')
+        previous = None
+    regressions = compare(timings, previous, args.threshold)
+
+    if not args.no_save:
+        # Keep timings of cases that were filtered out by --only
+        merged = dict(previous['timings']) if previous else {}
+        merged.update(timings)
+        with open(args.results, 'w') as out:
+            json.dump({'python': platform.python_version(), 'scale': args.scale,
+                       'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'timings': merged}, out, indent=2)
+
+    if regressions:
+        print(f'{len(regressions)} regression(s) above {args.threshold:.0%}')
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Intcode computer shared by the Advent of Code, 2019 solutions.
+"""
+
+from .decode import DECODE_TABLE, Instruction, parse_instruction
+from .vm import VM
+
+__all__ = ['DECODE_TABLE', 'Instruction', 'VM', 'parse_instruction']
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio runner for networks of Intcode VMs.
+
+Each VM runs as a task that reads from one asyncio.Queue and writes its outputs
+to any number of queues, so VMs can be wired in an arbitrary topology
+(pipelines, feedback loops, fan-out). A task gives its VM a quantum of
+instructions at a time and then yields to the event loop, which keeps
+switching cheap while letting many independent networks share one loop.
+
+When a VM halts, its task puts HALT on every output queue. A VM's input is
+closed once every VM feeding it has sent HALT (one per producer, so fan-in
+works); a VM that is waiting for input on a closed queue stops as well, since
+that input will never come.
+"""
+
+from typing import Iterable, List, Sequence, Tuple, Union
+import asyncio
+
+from .vm import VM
+
+QUANTUM = 1000
+
+# Explicit halt signal passed downstream when a VM finishes
+HALT = object()
+
+async def run_vm(vm: VM, inputs: asyncio.Queue, outputs: Sequence[asyncio.Queue],
+                 quantum: int = QUANTUM, producers: int = 1) -> VM:
+    # Producers that have not sent HALT yet
+    live = producers
+
+    while True:
+        # Pick up anything that arrived while this VM was running
+        while not inputs.empty():
+            value = inputs.get_nowait()
+            if value is HALT:
+                live -= 1
+            else:
+                vm.send(value)
+
+        vm.run(quantum)
+
+        while vm.outputs:
+            value = vm.outputs.popleft()
+            for queue in outputs:
+                queue.put_nowait(value)
+
+        if vm.halted:
+            break
+
+        if vm.waiting:
+            if live <= 0:
+                break
+            value = await inputs.get()
+            if value is HALT:
+                live -= 1
+            else:
+                vm.send(value)
+        else:
+            # Quantum used up, let the other VMs run
+            await asyncio.sleep(0)
+
+    for queue in outputs:
+        queue.put_nowait(HALT)
+
+    return vm
+
+async def run_network(vms: Sequence[VM],
+                      edges: Iterable[Tuple[int, Union[int, asyncio.Queue]]],
+                      quantum: int = QUANTUM) -> List[asyncio.Queue]:
+    # An edge (i, j) feeds VM i's outputs to VM j; (i, queue) sends them to
+    # a caller-owned queue instead, e.g. to collect a network's result
+    queues = [asyncio.Queue() for _ in vms]
+    targets = [[] for _ in vms]
+    producers = [0] * len(vms)
+
+    for src, dst in edges:
+        if isinstance(dst, int):
+            targets[src].append(queues[dst])
+            producers[dst] += 1
+        else:
+            targets[src].append(dst)
+
+    await asyncio.gather(*(run_vm(vm, queues[i], targets[i], quantum, producers[i])
+                           for i, vm in enumerate(vms)))
+
+    return queues
+
+def drain(queue: asyncio.Queue) -> List[int]:
+    values = []
+
+    while not queue.empty():
+        value = queue.get_nowait()
+        if value is not HALT:
+            values.append(value)
+
+    return values
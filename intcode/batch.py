@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Lockstep batch execution of many Intcode instances with NumPy.
+
+run_batch() runs N copies of one program, each with its own memory patches
+and inputs, over a 2-D int64 memory array (one row per instance). As long as
+every instance is at the same instruction pointer and decodes the same
+instruction word, one step is a handful of vector operations over all rows,
+so throughput grows with the batch instead of with interpreter overhead.
+
+A row is peeled off to the scalar VM as soon as it stops agreeing with the
+rest: a different instruction word (self-modification), a jump that goes
+elsewhere, an address outside the array, an input it does not have, or a
+value that could overflow 64 bits. The peeled VM is run from that exact state,
+so the results are the same as running every instance on its own VM.
+
+Every instance comes back as a VM. A VM that is not halted either waits for
+input or stopped on an invalid instruction or address.
+"""
+
+from typing import Dict, List, Sequence
+import numpy as np
+
+from .disasm import INSTRUCTIONS
+from .vm import VM
+
+# Rows with operands this large are handed to the scalar (bigint) path
+SAFE_MAGNITUDE = 1 << 62
+
+def run_scalar(program: Sequence[int], patch: Dict[int, int],
+               inputs: Sequence[int]) -> VM:
+    vm = VM(program, inputs)
+    for address, value in patch.items():
+        vm.memory[address] = value
+    try:
+        vm.run()
+    except (ValueError, IndexError):
+        pass
+    return vm
+
+def run_batch(program: Sequence[int], patches: Sequence[Dict[int, int]] = None,
+              inputs: Sequence[Sequence[int]] = None,
+              memory_size: int = 0) -> List[VM]:
+    count = len(patches) if patches is not None else len(inputs)
+    patches = patches if patches is not None else [{}] * count
+    inputs = [list(i) for i in inputs] if inputs is not None else [[]] * count
+
+    size = max(memory_size, len(program), *(max(p, default=-1) + 1 for p in patches))
+    mem = np.zeros((count, size), dtype=np.int64)
+    width = max((len(i) for i in inputs), default=0)
+    in_values = np.zeros((count, width), dtype=np.int64)
+    in_lengths = np.array([len(i) for i in inputs], dtype=np.int64)
+    try:
+        mem[:, :len(program)] = program
+        for row, patch in enumerate(patches):
+            for address, value in patch.items():
+                mem[row, address] = value
+        for row, values in enumerate(inputs):
+            in_values[row, :len(values)] = values
+    except OverflowError:
+        # Values beyond int64 from the start: nothing to gain from lockstep
+        return [run_scalar(program, patch, values)
+                for patch, values in zip(patches, inputs)]
+
+    relative_base = np.zeros(count, dtype=np.int64)
+    outputs = [[] for _ in range(count)]
+    results = [None] * count
+    rows = np.arange(count)
+    ip = 0
+    consumed = 0
+
+    def make_vm(row: int, row_ip: int) -> VM:
+        vm = VM(mem[row].tolist(), inputs[row][consumed:])
+        vm.ip = row_ip
+        vm.relative_base = int(relative_base[row])
+        vm.outputs.extend(outputs[row])
+        return vm
+
+    def peel(mask: np.ndarray, ips = None) -> np.ndarray:
+        # Finish the rows in `mask` on the scalar VM; return the rest
+        peeled = rows[mask]
+        row_ips = [ip] * len(peeled) if ips is None else ips[mask].tolist()
+        for row, row_ip in zip(peeled.tolist(), row_ips):
+            vm = make_vm(row, row_ip)
+            try:
+                vm.run()
+            except (ValueError, IndexError):
+                pass
+            results[row] = vm
+        return rows[~mask]
+
+    def addresses(inst, count_params: int) -> List[np.ndarray]:
+        found = []
+        modes = (inst.p1_mode, inst.p2_mode, inst.p3_mode)
+        for k in range(1, count_params + 1):
+            if modes[k - 1] == 1:
+                found.append(np.full(len(rows), ip + k, dtype=np.int64))
+            elif modes[k - 1] == 2:
+                found.append(relative_base[rows] + mem[rows, ip + k])
+            else:
+                found.append(mem[rows, ip + k])
+        return found
+
+    while rows.size:
+        if ip < 0 or ip >= size:
+            rows = peel(np.ones(len(rows), dtype=bool))
+            break
+
+        words = mem[rows, ip]
+        if (words != words[0]).any():
+            rows = peel(words != words[0])
+        word = int(words[0])
+
+        # Only words the VM accepts run in lockstep; the VM reports the rest
+        inst = INSTRUCTIONS.get(word)
+        if inst is None:
+            rows = peel(np.ones(len(rows), dtype=bool))
+            break
+
+        if inst.opcode == 99:
+            for row in rows.tolist():
+                vm = make_vm(row, ip)
+                vm.halted = True
+                results[row] = vm
+            break
+
+        if ip + inst.length > size:
+            rows = peel(np.ones(len(rows), dtype=bool))
+            break
+
+        # Peel rows whose operand addresses fall outside the array
+        params = inst.length - 1
+        addrs = addresses(inst, params)
+        bad = np.zeros(len(rows), dtype=bool)
+        for a in addrs:
+            bad |= (a < 0) | (a >= size)
+        if bad.any():
+            rows = peel(bad)
+            if not rows.size:
+                break
+            addrs = addresses(inst, params)
+
+        opcode = inst.opcode
+
+        if opcode in (1, 2, 7, 8):
+            a = mem[rows, addrs[0]]
+            b = mem[rows, addrs[1]]
+            if opcode == 1:
+                big = (np.abs(a) >= SAFE_MAGNITUDE) | (np.abs(b) >= SAFE_MAGNITUDE)
+            elif opcode == 2:
+                big = np.abs(a.astype(np.float64) * b) >= SAFE_MAGNITUDE
+            else:
+                big = None
+            if big is not None and big.any():
+                keep = ~big
+                rows = peel(big)
+                if not rows.size:
+                    break
+                a, b, addrs[2] = a[keep], b[keep], addrs[2][keep]
+
+            if opcode == 1:
+                mem[rows, addrs[2]] = a + b
+            elif opcode == 2:
+                mem[rows, addrs[2]] = a * b
+            elif opcode == 7:
+                mem[rows, addrs[2]] = a < b
+            else:
+                mem[rows, addrs[2]] = a == b
+            ip += 4
+
+        elif opcode == 3:
+            starved = in_lengths[rows] <= consumed
+            if starved.any():
+                rows = peel(starved)
+                if not rows.size:
+                    break
+                addrs = addresses(inst, 1)
+            mem[rows, addrs[0]] = in_values[rows, consumed]
+            consumed += 1
+            ip += 2
+
+        elif opcode == 4:
+            for row, value in zip(rows.tolist(), mem[rows, addrs[0]].tolist()):
+                outputs[row].append(value)
+            ip += 2
+
+        elif opcode in (5, 6):
+            a = mem[rows, addrs[0]]
+            jump = (a != 0) if opcode == 5 else (a == 0)
+            targets = np.where(jump, mem[rows, addrs[1]], ip + 3)
+            if (targets != targets[0]).any():
+                # Keep the most common target in lockstep, peel the rest
+                values, counts = np.unique(targets, return_counts=True)
+                common = values[np.argmax(counts)]
+                rows = peel(targets != common, targets)
+                ip = int(common)
+            else:
+                ip = int(targets[0])
+
+        elif opcode == 9:
+            relative_base[rows] += mem[rows, addrs[0]]
+            ip += 2
+
+    return results
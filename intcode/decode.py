@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Intcode instruction decoder.
+
+Every legal instruction word (opcode x three parameter-mode digits) is decoded
+once, at import time, into a DECODE_TABLE entry. Each entry is a handler
+function generated for that opcode and the modes of its parameters, so the hot
+loop never does modulo/division arithmetic or tests parameter modes.
+
+Handlers take (mem, ip, vm) and return the address of the next instruction.
+A handler that stops the machine (halt, an input that is not available yet,
+or an output channel that is full) records the resume address in vm.ip and
+returns -1.
+
+PAGED_TABLE holds the same handlers generated against PagedMemory's page
+directory: operands are read straight out of memory.pages and stores to a page
+the memory owns are done in place, so the common case makes no Python-level
+__getitem__/__setitem__ call at all. Anything those handlers cannot do in place
+(a negative or far address) raises IndexError before the instruction has had
+any effect, and the caller runs it again through DECODE_TABLE.
+"""
+
+from typing import Callable, Dict, NamedTuple
+from collections import namedtuple
+from itertools import product
+
+from .memory import PAGE_BITS, PAGE_MASK
+
+Instruction = namedtuple('Instruction', 'opcode p1_mode p2_mode p3_mode length')
+
+LENGTHS = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4, 9: 2, 99: 0}
+
+def parse_instruction(inst:int) -> NamedTuple:
+    # Opcode
+    opcode = inst % 100
+    inst = inst // 100
+
+    # P1
+    p1_mode = inst % 10
+    inst = inst // 10
+
+    # P2, if exists
+    if inst > 0:
+        p2_mode = inst % 10
+        inst = inst // 10
+    else:
+        p2_mode = 0
+
+    # P3, if exists
+    if inst > 0:
+        p3_mode = inst
+    else:
+        p3_mode = 0
+
+    if opcode not in LENGTHS:
+        raise ValueError(f'Invalid opcode: {opcode}')
+
+    return Instruction(opcode, p1_mode, p2_mode, p3_mode, LENGTHS[opcode])
+
+# Source templates for reading and writing parameter k in each mode
+READ = {0: 'mem[mem[ip + {k}]]',
+        1: 'mem[ip + {k}]',
+        2: 'mem[vm.relative_base + mem[ip + {k}]]'}
+
+WRITE = {0: 'mem[ip + {k}]',
+         1: 'ip + {k}',
+         2: 'vm.relative_base + mem[ip + {k}]'}
+
+# Paged handlers read cells straight from the page directory. The instruction's
+# own fields come from its page, `code`, at offset o + k: every page is
+# PAGE_SIZE long, so an instruction that runs over the end of its page raises
+# IndexError there. The address of a position or relative operand is
+# range-checked first, into a{k}
+CELL = 'pages[({a}) >> %d][({a}) & %d]' % (PAGE_BITS, PAGE_MASK)
+
+PAGED_WRITE = {0: 'code[o + {k}]',
+               1: 'ip + {k}',
+               2: 'vm.relative_base + code[o + {k}]'}
+
+# A store works out its address first (prepare) and only then writes (commit),
+# so a handler that gives up before the commit has changed nothing
+PREPARE = 'a = {w}'
+COMMIT = 'mem[a] = value'
+
+# Paged stores write in place to a page this memory owns; anything else
+# (copy-on-write, a new page, a bigint) goes through PagedMemory. A negative
+# or far address raises IndexError before anything has happened
+PAGED_PREPARE = """a = {w}
+if a < 0:
+    raise IndexError(a)
+page = a >> %d
+owned = mem.owned[page]""" % PAGE_BITS
+
+PAGED_COMMIT = """if owned:
+    try:
+        pages[page][a & %d] = value
+    except OverflowError:
+        mem[a] = value
+    if a >= mem.size:
+        mem.size = a + 1
+else:
+    mem[a] = value""" % PAGE_MASK
+
+# How many leading parameters each opcode reads
+READS = {1: 2, 2: 2, 3: 0, 4: 1, 5: 2, 6: 2, 7: 2, 8: 2, 9: 1, 99: 0}
+
+BODIES = {
+    # Add
+    1: ['value = {r1} + {r2}',
+        '{prepare3}',
+        '{commit3}',
+        'return ip + 4'],
+    # Multiply
+    2: ['value = {r1} * {r2}',
+        '{prepare3}',
+        '{commit3}',
+        'return ip + 4'],
+    # Input
+    3: ['if not vm.inputs:',
+        '    vm.ip = ip',
+        '    return -1',
+        '{prepare1}',
+        'value = vm.inputs.popleft()',
+        '{commit1}',
+        'return ip + 2'],
+    # Output: pauses without running while the channel is full, and as soon
+    # as it fills up, so a bounded channel never drops a value
+    4: ['outputs = vm.outputs',
+        'if len(outputs) == vm.output_limit:',
+        '    vm.ip = ip',
+        '    return -1',
+        'outputs.append({r1})',
+        'if len(outputs) == vm.output_limit:',
+        '    vm.ip = ip + 2',
+        '    return -1',
+        'return ip + 2'],
+    # Jump-If-True
+    5: ['if {r1}:',
+        '    target = {r2}',
+        '    if target < 0:',
+        '        raise ValueError(f"Address out of program bounds: {{target}}")',
+        '    return target',
+        'return ip + 3'],
+    # Jump-If-False
+    6: ['if not {r1}:',
+        '    target = {r2}',
+        '    if target < 0:',
+        '        raise ValueError(f"Address out of program bounds: {{target}}")',
+        '    return target',
+        'return ip + 3'],
+    # Less-Than
+    7: ['value = 1 if {r1} < {r2} else 0',
+        '{prepare3}',
+        '{commit3}',
+        'return ip + 4'],
+    # Equals
+    8: ['value = 1 if {r1} == {r2} else 0',
+        '{prepare3}',
+        '{commit3}',
+        'return ip + 4'],
+    # Adjust-Relative-Base
+    9: ['vm.relative_base += {r1}',
+        'return ip + 2'],
+    # Halt
+    99: ['vm.ip = ip',
+         'vm.halted = True',
+         'return -1'],
+}
+
+def make_handler_source(word: int, paged: bool = False) -> str:
+    inst = parse_instruction(word)
+    modes = (inst.p1_mode, inst.p2_mode, inst.p3_mode)
+    fields = {}
+    checks = []
+    lines = [f'def op_{word}(mem, ip, vm):']
+
+    for k, mode in enumerate(modes, 1):
+        if not paged:
+            fields[f'r{k}'] = READ[mode].format(k=k)
+            fields[f'w{k}'] = WRITE[mode].format(k=k)
+            fields[f'prepare{k}'] = PREPARE.format(w=fields[f'w{k}'])
+            fields[f'commit{k}'] = COMMIT
+            continue
+
+        fields[f'w{k}'] = PAGED_WRITE[mode].format(k=k)
+        fields[f'prepare{k}'] = PAGED_PREPARE.format(w=fields[f'w{k}'])
+        fields[f'commit{k}'] = PAGED_COMMIT
+        if mode == 1:
+            fields[f'r{k}'] = f'code[o + {k}]'
+        elif k <= READS[inst.opcode]:
+            checks += [f'a{k} = {fields[f"w{k}"]}',
+                       f'if a{k} < 0:',
+                       f'    raise IndexError(a{k})']
+            fields[f'r{k}'] = CELL.format(a=f'a{k}')
+
+    if paged:
+        lines += ['    pages = mem.pages',
+                  f'    code = pages[ip >> {PAGE_BITS}]',
+                  f'    o = ip & {PAGE_MASK}']
+        lines += ['    ' + line for line in checks]
+    for line in BODIES[inst.opcode]:
+        text = line.format(**fields)
+        indent = line[:len(line) - len(line.lstrip())]
+        lines += ['    ' + (indent if n else '') + part
+                  for n, part in enumerate(text.split('\n'))]
+
+    return '\n'.join(lines) + '\n'
+
+def build_decode_table(paged: bool = False) -> Dict[int, Callable]:
+    table = {}
+    namespace = {}
+
+    for opcode, m1, m2, m3 in product(LENGTHS, range(3), range(3), range(3)):
+        word = opcode + 100 * m1 + 1000 * m2 + 10000 * m3
+        # Modes of parameters the opcode does not have change nothing, so
+        # those words share the handler of the word with them left at 0
+        base = word % 10 ** (max(LENGTHS[opcode], 1) + 1)
+        if f'op_{base}' not in namespace:
+            exec(compile(make_handler_source(base, paged), f'<intcode op {base}>', 'exec'),
+                 namespace)
+        table[word] = namespace[f'op_{base}']
+
+    return table
+
+DECODE_TABLE = build_decode_table()
+PAGED_TABLE = build_decode_table(paged=True)
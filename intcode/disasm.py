@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Static disassembler and control-flow graph for Intcode programs.
+
+disassemble() decodes a program by recursive traversal from its entry point:
+it follows fall-through and every jump target that is known statically
+(immediate-mode targets), so words that are never reached as instructions
+are treated as data instead of being misread as code. Jumps whose condition
+is an immediate constant are recognised as unconditional.
+
+Subroutine returns are indirect jumps, so the code after a call is only
+reachable through a return address the program stores first. Constants stored
+by add/mul with a neutral immediate operand (e.g. add 0, 39, [rb+1]) that land
+on a decodable word are therefore followed as well.
+
+build_cfg() splits the decoded instructions into basic blocks and links them.
+A block ending in a jump whose target is only known at run time (position or
+relative mode) is flagged `indirect`.
+
+listing() renders the result as text, one instruction or data word per line.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence
+from collections import namedtuple
+
+from .decode import DECODE_TABLE, parse_instruction
+
+Decoded = namedtuple('Decoded', 'address instruction params')
+
+MNEMONICS = {1: 'add', 2: 'mul', 3: 'in', 4: 'out', 5: 'jnz', 6: 'jz',
+             7: 'lt', 8: 'eq', 9: 'arb', 99: 'halt'}
+
+# Every legal instruction word, decoded once
+INSTRUCTIONS = {word: parse_instruction(word) for word in DECODE_TABLE}
+
+class BasicBlock():
+    __slots__ = ('start', 'end', 'instructions', 'successors', 'predecessors',
+                 'indirect')
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.end = start
+        self.instructions = []
+        self.successors = []
+        self.predecessors = []
+        self.indirect = False
+
+    def __repr__(self) -> str:
+        return (f'BasicBlock({self.start}-{self.end}, {len(self.instructions)} '
+                f'instructions, successors={self.successors})')
+
+def decode_at(memory, address: int) -> Optional[Decoded]:
+    inst = INSTRUCTIONS.get(memory[address])
+    if inst is None:
+        return None
+    params = tuple(memory[address + k] for k in range(1, inst.length))
+    return Decoded(address, inst, params)
+
+def jump_target(decoded: Decoded) -> Optional[int]:
+    # Only immediate targets are known without running the program
+    if decoded.instruction.p2_mode == 1:
+        return decoded.params[1]
+    return None
+
+def always_jumps(decoded: Decoded) -> bool:
+    inst = decoded.instruction
+    if inst.p1_mode != 1:
+        return False
+    return (decoded.params[0] != 0) == (inst.opcode == 5)
+
+def stored_constant(decoded: Decoded) -> Optional[int]:
+    # Constant written by add x, 0 / add 0, x / mul x, 1 / mul 1, x
+    inst = decoded.instruction
+    if inst.opcode not in (1, 2) or inst.p1_mode != 1 or inst.p2_mode != 1:
+        return None
+    neutral = 0 if inst.opcode == 1 else 1
+    a, b = decoded.params[0], decoded.params[1]
+    if a == neutral:
+        return b
+    if b == neutral:
+        return a
+    return None
+
+def disassemble(program: Sequence[int], entries: Iterable[int] = (0,),
+                infer_returns: bool = True) -> Dict[int, Decoded]:
+    length = len(program)
+    # Pad so the operands of a trailing instruction can always be read
+    padded = list(program) + [0, 0, 0]
+    code = {}
+    work = list(entries)
+
+    while work:
+        address = work.pop()
+        while 0 <= address < length and address not in code:
+            decoded = decode_at(padded, address)
+            if decoded is None:
+                break
+            code[address] = decoded
+
+            opcode = decoded.instruction.opcode
+            if opcode == 99:
+                break
+            if opcode in (5, 6):
+                target = jump_target(decoded)
+                if target is not None:
+                    work.append(target)
+                if always_jumps(decoded):
+                    break
+            elif infer_returns:
+                constant = stored_constant(decoded)
+                if constant is not None and 0 <= constant < length:
+                    work.append(constant)
+
+            address += decoded.instruction.length
+
+    return code
+
+def build_cfg(program: Sequence[int], entries: Iterable[int] = (0,),
+              infer_returns: bool = True) -> Dict[int, BasicBlock]:
+    entries = list(entries)
+    code = disassemble(program, entries, infer_returns)
+
+    # Block leaders: entry points, jump targets, whatever follows a jump and
+    # inferred return addresses
+    leaders = {e for e in entries if e in code}
+    for decoded in code.values():
+        if infer_returns and stored_constant(decoded) in code:
+            leaders.add(stored_constant(decoded))
+        if decoded.instruction.opcode in (5, 6):
+            target = jump_target(decoded)
+            if target in code:
+                leaders.add(target)
+            after = decoded.address + decoded.instruction.length
+            if after in code:
+                leaders.add(after)
+
+    blocks = {}
+    for start in sorted(leaders):
+        block = BasicBlock(start)
+        address = start
+        while True:
+            decoded = code[address]
+            block.instructions.append(decoded)
+            address += decoded.instruction.length
+            opcode = decoded.instruction.opcode
+
+            if opcode == 99:
+                break
+            if opcode in (5, 6):
+                target = jump_target(decoded)
+                if target is None:
+                    block.indirect = True
+                elif target in code:
+                    block.successors.append(target)
+                if not always_jumps(decoded) and address in code:
+                    block.successors.append(address)
+                break
+            if address not in code:
+                break
+            if address in leaders:
+                block.successors.append(address)
+                break
+
+        block.end = address
+        blocks[start] = block
+
+    for block in blocks.values():
+        for successor in block.successors:
+            blocks[successor].predecessors.append(block.start)
+
+    return blocks
+
+def format_operand(mode: int, value: int) -> str:
+    if mode == 1:
+        return str(value)
+    if mode == 2:
+        return f'[rb{value:+d}]'
+    return f'[{value}]'
+
+def format_instruction(decoded: Decoded) -> str:
+    inst = decoded.instruction
+    modes = (inst.p1_mode, inst.p2_mode, inst.p3_mode)
+    operands = ', '.join(format_operand(mode, value)
+                         for mode, value in zip(modes, decoded.params))
+    return f'{MNEMONICS[inst.opcode]} {operands}'.rstrip()
+
+def listing(program: Sequence[int], entries: Iterable[int] = (0,),
+            infer_returns: bool = True) -> str:
+    code = disassemble(program, entries, infer_returns)
+    lines = []
+    address = 0
+
+    while address < len(program):
+        decoded = code.get(address)
+        if decoded is None:
+            lines.append(f'{address:6d}  data {program[address]}')
+            address += 1
+        else:
+            lines.append(f'{address:6d}  {format_instruction(decoded)}')
+            address += max(decoded.instruction.length, 1)
+
+    return '\n'.join(lines)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Basic-block compiler for Intcode.
+
+JITVM runs a program by translating each basic block, the first time it is
+entered, into a generated Python function built with compile(). Operands are
+resolved at compile time: immediates become literals and position-mode
+reads index the memory page directly (pages[i][offset]) instead of going
+through PagedMemory.__getitem__, so a block does no decoding and no
+per-instruction dispatch. Stores still go through the memory object, which
+handles page allocation, copy-on-write and bigint promotion; the directory
+list is only ever extended, so a compiled page index stays valid. A block ends after a jump or halt, or before an
+invalid instruction word. Input, output and halt are compiled in as well and
+stop the machine exactly like the interpreter handlers (vm.ip, return -1).
+
+Intcode programs can modify themselves. Every address a compiled block was
+built from is recorded in `owners` (address -> blocks built from it); each
+store checks it, and a store into a compiled block throws that block away and
+leaves the current block, so the changed instructions are recompiled from the
+new words.
+"""
+
+from typing import Callable, List, Tuple
+
+from .disasm import decode_at
+from .memory import PAGE_BITS, PAGE_MASK
+from .vm import VM
+
+# Upper bound on instructions per compiled block
+MAX_BLOCK = 128
+
+def read_operand(mode: int, param: int, page_count: int) -> str:
+    if mode == 1:
+        return str(param)
+    if mode == 2:
+        return f'mem[rb + {param}]'
+    if 0 <= param and param >> PAGE_BITS < page_count:
+        return f'pages[{param >> PAGE_BITS}][{param & PAGE_MASK}]'
+    return f'mem[{param}]'
+
+def write_address(mode: int, param: int, address: int) -> str:
+    if mode == 1:
+        return str(address)
+    if mode == 2:
+        return f'rb + {param}'
+    return str(param)
+
+class JITVM(VM):
+    __slots__ = ('blocks', 'owners')
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.blocks = {}
+        self.owners = {}
+
+    def invalidate(self, address: int) -> None:
+        for start in self.owners.pop(address, ()):
+            block = self.blocks.pop(start, None)
+            if block is None:
+                continue
+            for covered in range(start, block.end):
+                owners = self.owners.get(covered)
+                if owners and start in owners:
+                    owners.remove(start)
+                    if not owners:
+                        del self.owners[covered]
+
+    def block_source(self, start: int) -> Tuple[List[str], int, int]:
+        mem = self.memory
+        lines = [f'def block_{start}(mem, vm):',
+                 '    rb = vm.relative_base']
+        ip = start
+        size = 0
+
+        def leave(target: str, indent: str = '    ') -> List[str]:
+            # Store the relative base back before leaving the block
+            return [f'{indent}vm.relative_base = rb', f'{indent}return {target}']
+
+        def store(address: str, value: str, next_ip: int) -> List[str]:
+            return [f'    a = {address}',
+                    f'    mem[a] = {value}',
+                    '    if a in code:',
+                    '        invalidate(a)'] + leave(str(next_ip), '        ')
+
+        while size < MAX_BLOCK:
+            decoded = decode_at(mem, ip)
+            if decoded is None:
+                if size == 0:
+                    raise ValueError(f'Invalid instruction {mem[ip]} at address {ip}')
+                lines += leave(str(ip))
+                break
+
+            inst = decoded.instruction
+            params = list(decoded.params) + [0] * (3 - len(decoded.params))
+            modes = (inst.p1_mode, inst.p2_mode, inst.p3_mode)
+            r = [read_operand(modes[k], params[k], len(mem.pages)) for k in range(3)]
+            w = [write_address(modes[k], params[k], ip + k + 1) for k in range(3)]
+            # Halt has length 0, but its word still belongs to the block
+            next_ip = ip + max(inst.length, 1)
+            size += 1
+
+            if inst.opcode == 1:
+                lines += store(w[2], f'{r[0]} + {r[1]}', next_ip)
+            elif inst.opcode == 2:
+                lines += store(w[2], f'{r[0]} * {r[1]}', next_ip)
+            elif inst.opcode == 7:
+                lines += store(w[2], f'1 if {r[0]} < {r[1]} else 0', next_ip)
+            elif inst.opcode == 8:
+                lines += store(w[2], f'1 if {r[0]} == {r[1]} else 0', next_ip)
+            elif inst.opcode == 9:
+                lines += [f'    rb += {r[0]}']
+            elif inst.opcode == 3:
+                lines += ['    if not vm.inputs:',
+                          f'        vm.ip = {ip}'] + leave('-1', '        ')
+                lines += store(w[0], 'vm.inputs.popleft()', next_ip)
+            elif inst.opcode == 4:
+                lines += ['    outputs = vm.outputs',
+                          '    if len(outputs) == vm.output_limit:',
+                          f'        vm.ip = {ip}'] + leave('-1', '        ')
+                lines += [f'    outputs.append({r[0]})',
+                          '    if len(outputs) == vm.output_limit:',
+                          f'        vm.ip = {next_ip}'] + leave('-1', '        ')
+            elif inst.opcode in (5, 6):
+                test = r[0] if inst.opcode == 5 else f'not {r[0]}'
+                lines += [f'    if {test}:',
+                          f'        target = {r[1]}',
+                          '        if target < 0:',
+                          '            raise ValueError(f"Address out of program bounds: {target}")']
+                lines += leave('target', '        ')
+                lines += leave(str(next_ip))
+                ip = next_ip
+                break
+            elif inst.opcode == 99:
+                lines += [f'    vm.ip = {ip}',
+                          '    vm.halted = True'] + leave('-1')
+                ip = next_ip
+                break
+
+            ip = next_ip
+        else:
+            lines += leave(str(ip))
+
+        return lines, ip, size
+
+    def compile(self, start: int) -> Callable:
+        lines, end, size = self.block_source(start)
+
+        namespace = {'code': self.owners, 'invalidate': self.invalidate,
+                     'pages': self.memory.pages}
+        exec(compile('\n'.join(lines) + '\n', f'<intcode block {start}>', 'exec'),
+             namespace)
+        block = namespace[f'block_{start}']
+        block.end = end
+        block.size = size
+
+        self.blocks[start] = block
+        for address in range(start, end):
+            self.owners.setdefault(address, []).append(start)
+
+        return block
+
+    def fork(self) -> 'JITVM':
+        # Compiled blocks are bound to this VM and its memory
+        child = super().fork()
+        child.blocks = {}
+        child.owners = {}
+        return child
+
+    def restore(self, snapshot: VM) -> None:
+        # Compiled blocks belong to the old memory
+        super().restore(snapshot)
+        self.blocks = {}
+        self.owners = {}
+
+    def run(self, steps: int = None) -> bool:
+        mem = self.memory
+        blocks = self.blocks
+        ip = self.ip
+
+        # With a step budget, whole blocks are run until it is used up
+        while ip >= 0 and (steps is None or steps > 0):
+            block = blocks.get(ip)
+            if block is None:
+                block = self.compile(ip)
+            if steps is not None:
+                steps -= block.size
+            ip = block(mem, self)
+
+        if ip >= 0:
+            self.ip = ip
+
+        return self.halted
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Paged Intcode memory.
+
+Memory is split into fixed-size pages of array('q') cells. A page is only
+allocated the first time something is stored in it; reads from untouched
+memory come from a shared, read-only page of zeros. Pages are found through a
+plain list indexed by page number, so loads and stores never hash. Pages far
+beyond the directory limit (a program touching some huge address) live in a
+dict instead of growing the directory to match.
+
+A page that has to hold a value that does not fit in 64 bits is converted to a
+list of Python ints, so arbitrary-precision values keep working.
+
+Every load and store through PagedMemory is a Python-level call, so the hot
+paths do not use it: the interpreter's PAGED_TABLE handlers and intcode.jit's
+compiled blocks index the pages directly and only fall back to PagedMemory for
+a page they cannot write in place.
+
+fork() makes a copy-on-write clone: parent and child share every page until
+one of them stores into it, at which point only that page is copied. Each
+memory tracks which pages it owns (may write in place) in a bytearray that
+runs parallel to the page directory.
+"""
+
+from typing import Iterable, List
+from array import array
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+# Largest number of pages kept in the directory list (64M words)
+DIRECTORY_LIMIT = 1 << 16
+
+ZERO_PAGE = array('q', bytes(8 * PAGE_SIZE))
+
+def new_page(values: Iterable[int] = ()) -> array:
+    values = list(values)
+    try:
+        page = array('q', values)
+    except OverflowError:
+        return values + [0] * (PAGE_SIZE - len(values))
+    page.extend(ZERO_PAGE[len(values):])
+    return page
+
+class PagedMemory():
+    __slots__ = ('pages', 'owned', 'far', 'far_owned', 'size')
+
+    def __init__(self, program: Iterable[int] = ()) -> None:
+        self.pages = []
+        self.owned = bytearray()
+        self.far = {}
+        self.far_owned = set()
+        self.size = 0
+        self.load(program)
+
+    def load(self, program: Iterable[int]) -> None:
+        program = list(program)
+
+        for start in range(0, len(program), PAGE_SIZE):
+            self._set_page(start >> PAGE_BITS, new_page(program[start:start + PAGE_SIZE]))
+
+        self.size = max(self.size, len(program))
+
+    def __getitem__(self, address: int) -> int:
+        if address < 0:
+            raise IndexError(f'Negative memory address: {address}')
+        try:
+            return self.pages[address >> PAGE_BITS][address & PAGE_MASK]
+        except IndexError:
+            return self.far.get(address >> PAGE_BITS, ZERO_PAGE)[address & PAGE_MASK]
+
+    def __setitem__(self, address: int, value: int) -> None:
+        if address < 0:
+            raise IndexError(f'Negative memory address: {address}')
+
+        index = address >> PAGE_BITS
+        try:
+            page = self.pages[index]
+            if not self.owned[index]:
+                page = self._writable_page(index)
+        except IndexError:
+            page = self._writable_page(index)
+
+        try:
+            page[address & PAGE_MASK] = value
+        except OverflowError:
+            # Fall back to arbitrary-precision cells for this page
+            page = list(page)
+            page[address & PAGE_MASK] = value
+            self._set_page(index, page)
+
+        if address >= self.size:
+            self.size = address + 1
+
+    def _set_page(self, index: int, page) -> None:
+        if index >= DIRECTORY_LIMIT:
+            self.far[index] = page
+            self.far_owned.add(index)
+            return
+
+        if index >= len(self.pages):
+            grow = index + 1 - len(self.pages)
+            self.pages.extend([ZERO_PAGE] * grow)
+            self.owned.extend(bytes(grow))
+
+        self.pages[index] = page
+        self.owned[index] = 1
+
+    def _writable_page(self, index: int):
+        # Allocate an untouched page, or copy a page shared with a fork
+        if index >= DIRECTORY_LIMIT:
+            page = self.far.get(index, ZERO_PAGE)
+            if index in self.far_owned:
+                return page
+        elif index < len(self.pages):
+            page = self.pages[index]
+            if self.owned[index]:
+                return page
+        else:
+            page = ZERO_PAGE
+
+        page = page[:]
+        self._set_page(index, page)
+        return page
+
+    def fork(self) -> 'PagedMemory':
+        child = PagedMemory.__new__(PagedMemory)
+        child.pages = self.pages[:]
+        child.far = self.far.copy()
+        child.size = self.size
+
+        # Every page is now shared, so neither side may write in place
+        child.owned = bytearray(len(self.pages))
+        child.far_owned = set()
+        self.owned = bytearray(len(self.pages))
+        self.far_owned = set()
+
+        return child
+
+    def page_count(self) -> int:
+        return sum(p is not ZERO_PAGE for p in self.pages) + len(self.far)
+
+    def owned_page_count(self) -> int:
+        return sum(self.owned) + len(self.far_owned)
+
+    def to_list(self) -> List[int]:
+        return [self[i] for i in range(self.size)]
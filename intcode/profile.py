@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in execution profiler for Intcode programs.
+
+ProfiledVM is a VM whose `table` holds instrumented copies of the
+DECODE_TABLE handlers: each one runs the real handler and counts (address,
+instruction word), and the jump handlers also count every backward jump taken.
+An input or output that pauses the VM is counted when it runs on resume, not
+when it gives up. A plain VM keeps dispatching through the original table, so profiling
+costs nothing unless a ProfiledVM is used.
+
+From the raw counts a Profile reports instructions per opcode, per mode
+combination (instruction word) and per address, and the hot loops: every
+backward jump target..source range, with how often it went round and how many
+instructions ran inside it.
+
+Profiles export as JSON (to_json) or as folded stacks (to_folded), one
+`frame;frame;... count` line per address, with the enclosing loops as frames.
+That is the input format of flamegraph.pl, speedscope and inferno.
+
+    python -m intcode.profile Day09/day09_input.txt 2 [json|folded]
+"""
+
+from typing import Callable, Dict, Iterable, List, Tuple
+from collections import Counter
+import json
+import sys
+
+from .decode import DECODE_TABLE, parse_instruction
+from .disasm import MNEMONICS
+from .vm import VM
+
+def mode_name(word: int) -> str:
+    inst = parse_instruction(word)
+    modes = (inst.p1_mode, inst.p2_mode, inst.p3_mode)[:max(inst.length - 1, 0)]
+    return MNEMONICS[inst.opcode] + ''.join(str(mode) for mode in modes)
+
+def instrument(word: int, handler: Callable) -> Callable:
+    if word % 100 in (5, 6):
+        def op(mem, ip, vm):
+            target = handler(mem, ip, vm)
+            key = (ip, word)
+            hits = vm.hits
+            hits[key] = hits.get(key, 0) + 1
+            # Backward jump taken: one more round of the loop target..ip
+            if 0 <= target <= ip:
+                edge = (target, ip)
+                vm.loops[edge] = vm.loops.get(edge, 0) + 1
+            return target
+    else:
+        def op(mem, ip, vm):
+            next_ip = handler(mem, ip, vm)
+            # Paused without running: left at ip and not halted
+            if next_ip >= 0 or vm.halted or vm.ip != ip:
+                key = (ip, word)
+                hits = vm.hits
+                hits[key] = hits.get(key, 0) + 1
+            return next_ip
+
+    op.__name__ = f'profiled_{word}'
+    return op
+
+PROFILED_TABLE = {word: instrument(word, handler)
+                  for word, handler in DECODE_TABLE.items()}
+
+class Profile():
+    def __init__(self, hits: Dict[Tuple[int, int], int],
+                 loops: Dict[Tuple[int, int], int]) -> None:
+        # (address, instruction word) -> executions
+        self.hits = dict(hits)
+        # (loop head, backward jump address) -> times taken
+        self.loops = dict(loops)
+
+    @property
+    def total(self) -> int:
+        return sum(self.hits.values())
+
+    def by_opcode(self) -> Counter:
+        counts = Counter()
+        for (_, word), count in self.hits.items():
+            counts[MNEMONICS[word % 100]] += count
+        return counts
+
+    def by_mode(self) -> Counter:
+        counts = Counter()
+        for (_, word), count in self.hits.items():
+            counts[mode_name(word)] += count
+        return counts
+
+    def by_address(self) -> Counter:
+        counts = Counter()
+        for (address, _), count in self.hits.items():
+            counts[address] += count
+        return counts
+
+    def hot_loops(self, top: int = None) -> List[dict]:
+        by_address = self.by_address()
+        loops = []
+
+        for (head, tail), rounds in self.loops.items():
+            inside = sum(count for address, count in by_address.items()
+                         if head <= address <= tail)
+            loops.append({'head': head, 'tail': tail, 'iterations': rounds,
+                          'instructions': inside})
+
+        loops.sort(key=lambda loop: (-loop['instructions'], loop['head']))
+        return loops[:top]
+
+    def to_dict(self, top: int = 20) -> dict:
+        return {'instructions': self.total,
+                'opcodes': dict(self.by_opcode().most_common()),
+                'modes': dict(self.by_mode().most_common()),
+                'addresses': {str(a): c for a, c in sorted(self.by_address().items())},
+                'hot_loops': self.hot_loops(top)}
+
+    def to_json(self, top: int = 20, **kwargs) -> str:
+        return json.dumps(self.to_dict(top), **kwargs)
+
+    def to_folded(self, root: str = 'intcode') -> str:
+        # Outermost loop first, so nested loops become deeper frames
+        spans = sorted(self.loops, key=lambda span: (span[0], -span[1]))
+        lines = []
+
+        for (address, word), count in sorted(self.hits.items()):
+            frames = [root]
+            frames += [f'loop_{head}_{tail}' for head, tail in spans
+                       if head <= address <= tail]
+            frames.append(f'{mode_name(word)}@{address}')
+            lines.append(f'{";".join(frames)} {count}')
+
+        return '\n'.join(lines)
+
+class ProfiledVM(VM):
+    __slots__ = ('hits', 'loops')
+
+    table = PROFILED_TABLE
+    checked_table = PROFILED_TABLE
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.hits = {}
+        self.loops = {}
+
+    def fork(self) -> 'ProfiledVM':
+        # The clone carries on counting from the parent's profile
+        child = super().fork()
+        child.hits = dict(self.hits)
+        child.loops = dict(self.loops)
+        return child
+
+    def restore(self, snapshot: 'ProfiledVM') -> None:
+        # Back to the profile as it was when the snapshot was taken
+        super().restore(snapshot)
+        self.hits = dict(snapshot.hits)
+        self.loops = dict(snapshot.loops)
+
+    @property
+    def profile(self) -> Profile:
+        return Profile(self.hits, self.loops)
+
+def profile_program(program: Iterable[int], inputs: Iterable[int] = None) -> Profile:
+    vm = ProfiledVM(program, inputs)
+    vm.run()
+    return vm.profile
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'r') as inp:
+        program = [int(i) for i in inp.read().strip().split(',')]
+    inputs = [int(sys.argv[2])] if len(sys.argv) > 2 else []
+    kind = sys.argv[3] if len(sys.argv) > 3 else 'json'
+
+    profile = profile_program(program, inputs)
+    print(profile.to_folded() if kind == 'folded' else profile.to_json(indent=2))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Process-pool search for the best-scoring input to an Intcode program.
+
+search_max() shards a list of candidates (e.g. phase permutations) across a
+pool of worker processes. The program is shipped to each worker once, through
+the pool initializer, and every task only carries a chunk of candidates. Each
+worker reduces its chunk to the best (score, candidate) and the parent reduces
+those. Ties go to the candidate that comes first, as in a serial search.
+
+map_chunks() is the pool underneath, for searches that are not a plain
+maximum: it runs task(program, chunk) for every chunk in the workers, with the
+program shipped the same way, and yields the results in chunk order.
+
+`score` is called as score(program, candidate) and `task` as task(program,
+chunk). Both have to be picklable, so use a module-level function (or a
+functools.partial of one).
+"""
+
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+
+# Set in each worker process by init_worker
+worker_task = None
+worker_program = None
+
+def init_worker(task: Callable, program: List[int]) -> None:
+    global worker_task, worker_program
+    worker_task = task
+    worker_program = program
+
+def run_chunk(chunk: Sequence[Any]) -> Any:
+    return worker_task(worker_program, chunk)
+
+def map_chunks(task: Callable, chunks: Iterable[Sequence[Any]], program: List[int],
+               workers: int = None) -> Iterator[Any]:
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(task, program)) as pool:
+        # map() returns results in chunk order
+        yield from pool.map(run_chunk, chunks)
+
+def best_of(score: Callable, program: List[int],
+            candidates: Iterable[Any]) -> Tuple[Optional[int], Any]:
+    best_score = best = None
+
+    for candidate in candidates:
+        this_score = score(program, candidate)
+        if best_score is None or this_score > best_score:
+            best_score = this_score
+            best = candidate
+
+    return best_score, best
+
+def search_max(score: Callable, candidates: Iterable[Any], program: List[int],
+               workers: int = None, chunks_per_worker: int = 4) -> Tuple[Optional[int], Any]:
+    if workers == 1:
+        return best_of(score, program, candidates)
+
+    candidates = list(candidates)
+    workers = workers or os.cpu_count() or 1
+    size = max(1, -(-len(candidates) // (workers * chunks_per_worker)))
+    chunks = [candidates[i:i + size] for i in range(0, len(candidates), size)]
+
+    best_score = best = None
+    # Chunk results come back in order, which keeps ties stable
+    for this_score, candidate in map_chunks(partial(best_of, score), chunks,
+                                            program, workers):
+        if this_score is not None and (best_score is None or this_score > best_score):
+            best_score = this_score
+            best = candidate
+
+    return best_score, best
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Resumable Intcode virtual machine.
+
+A VM owns its (paged) memory, instruction pointer and relative base. Input
+values are taken from the `inputs` channel and results appended to the
+`outputs` channel. Any object with popleft() and len() works as an input
+channel and any object with append() works as an output channel; both default
+to a deque.
+
+run() executes until the program halts or needs an input that is not there
+yet. In the second case the VM can be fed more input and run() again, picking
+up exactly where it stopped.
+
+An output channel with a maxlen (e.g. deque(maxlen=64)) is a bounded ring
+buffer: the VM pauses as soon as it is full instead of overwriting values, so
+stream() can hand outputs to a consumer while the program is still running
+without ever buffering more than maxlen of them.
+
+fork() clones a (typically paused) VM: memory is shared copy-on-write with the
+parent, while the instruction pointer, relative base and channel contents are
+copied. snapshot() takes such a clone to restore() later, as many times as
+needed. A fork has the type of its parent; subclasses with state of their own
+extend fork() and restore() to fill in their extra slots.
+
+Instructions are dispatched through the class attribute `table` (the shared
+PAGED_TABLE), so a subclass can swap in different handlers, e.g. the
+instrumented ones in intcode.profile, without any test in the hot loop. run()
+fetches instruction words straight from the page directory too; an
+instruction at, or touching, an address the fast path cannot reach in place
+is run again through `checked_table` (DECODE_TABLE), which goes through
+PagedMemory for every access.
+"""
+
+from typing import Iterable, Iterator, List
+from collections import deque
+import copy
+
+from .decode import DECODE_TABLE, PAGED_TABLE
+from .memory import PAGE_BITS, PAGE_MASK, PagedMemory
+
+class VM():
+    __slots__ = ('memory', 'ip', 'relative_base', 'halted', 'inputs', 'outputs',
+                 'output_limit')
+
+    # Handler per instruction word, and the fallback for far or negative addresses
+    table = PAGED_TABLE
+    checked_table = DECODE_TABLE
+
+    def __init__(self, program: Iterable[int], inputs: Iterable[int] = None,
+                 outputs = None) -> None:
+        self.memory = PagedMemory(program)
+        self.ip = 0
+        self.relative_base = 0
+        self.halted = False
+
+        if inputs is None or not hasattr(inputs, 'popleft'):
+            inputs = deque(inputs or [])
+        self.inputs = inputs
+        self.outputs = deque() if outputs is None else outputs
+        self.output_limit = getattr(self.outputs, 'maxlen', None)
+
+    def send(self, *values: int) -> None:
+        self.inputs.extend(values)
+
+    def run(self, steps: int = None) -> bool:
+        mem = self.memory
+        pages = mem.pages
+        ip = self.ip
+        table = self.table
+        checked = self.checked_table
+
+        try:
+            if steps is None:
+                while ip >= 0:
+                    try:
+                        while ip >= 0:
+                            ip = table[pages[ip >> PAGE_BITS][ip & PAGE_MASK]](mem, ip, self)
+                    except IndexError:
+                        # Nothing has happened yet: redo it the checked way
+                        ip = checked[mem[ip]](mem, ip, self)
+            else:
+                # Stop after `steps` instructions, e.g. for a scheduler quantum
+                while ip >= 0 and steps > 0:
+                    try:
+                        ip = table[pages[ip >> PAGE_BITS][ip & PAGE_MASK]](mem, ip, self)
+                    except IndexError:
+                        ip = checked[mem[ip]](mem, ip, self)
+                    steps -= 1
+                if ip >= 0:
+                    self.ip = ip
+        except KeyError:
+            if mem[ip] in table:
+                raise
+            self.ip = ip
+            raise ValueError(f'Invalid instruction {mem[ip]} at address {ip}') from None
+
+        return self.halted
+
+    def stream(self) -> Iterator[int]:
+        outputs = self.outputs
+
+        while True:
+            halted = self.run()
+
+            # Stopped without producing anything: waiting for more input
+            if not outputs and not halted:
+                return
+
+            while outputs:
+                yield outputs.popleft()
+
+            if halted:
+                return
+
+    @property
+    def waiting(self) -> bool:
+        # Paused on an input instruction with nothing to read
+        return (not self.halted and not self.inputs
+                and self.memory[self.ip] % 100 == 3)
+
+    def fork(self) -> 'VM':
+        child = type(self).__new__(type(self))
+        child.memory = self.memory.fork()
+        child.ip = self.ip
+        child.relative_base = self.relative_base
+        child.halted = self.halted
+        child.inputs = copy.copy(self.inputs)
+        child.outputs = copy.copy(self.outputs)
+        child.output_limit = self.output_limit
+        return child
+
+    def snapshot(self) -> 'VM':
+        return self.fork()
+
+    def restore(self, snapshot: 'VM') -> None:
+        state = snapshot.fork()
+        for name in VM.__slots__:
+            setattr(self, name, getattr(state, name))
+
+    def dump(self) -> List[int]:
+        return self.memory.to_list()
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+Test configuration: makes the day modules and the intcode package importable.
+
+Each day lives in its own DayNN directory and is run from there as a script,
+so the directories are put on sys.path here rather than packaged.
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DAYS = sorted(d for d in os.listdir(ROOT) if d.startswith('Day'))
+
+sys.path.insert(0, ROOT)
+for day in DAYS:
+    sys.path.append(os.path.join(ROOT, day))
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 1 examples.
+"""
+
+from day01_rocket_equation import calculate_fuel, calculate_fuel_recursive
+
+def test_calculate_fuel():
+    assert (calculate_fuel(12) == 2)
+    assert (calculate_fuel(14) == 2)
+    assert (calculate_fuel(1969) == 654)
+    assert (calculate_fuel(100756) == 33583)
+
+def test_calculate_fuel_recursive():
+    assert (calculate_fuel_recursive(14) == 2)
+    assert (calculate_fuel_recursive(1969) == 966)
+    assert (calculate_fuel_recursive(100756) == 50346)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 2 examples.
+"""
+
+from day02_program_alarm import SERIAL_RUNS, find_output, find_output_brute, run_intcode
+
+def test_run_intcode():
+    assert run_intcode([1,0,0,0,99]) == [2,0,0,0,99]
+    assert run_intcode([2,3,0,3,99]) == [2,3,0,6,99]
+    assert run_intcode([2,4,4,5,99,0]) == [2,4,4,5,99,9801]
+    assert run_intcode([1,1,1,4,99,5,6,0,99]) == [30,1,1,4,2,5,6,0,99]
+
+def test_run_intcode_flags_bad_programs():
+    # Stores past the end (however far) and to negative addresses
+    assert run_intcode([1,0,0,10**12,99])[0] == -1
+    assert run_intcode([1,0,0,5,99])[0] == -1
+    assert run_intcode([1,0,0,-1,99])[0] == -1
+    assert run_intcode([1,0,0,0,42])[0] == -1
+
+def test_find_output():
+    assert find_output([1,0,0,0,99], 4) == (2, 2)
+
+def test_find_output_brute_pool():
+    # Big enough for the process pool, which has to agree with the serial scan
+    prog = [1,0,0,0,99] + [0] * 35
+    assert 40 * 40 >= SERIAL_RUNS
+    assert find_output_brute(prog, 100, 40, workers=2) == (0, 4)
+    assert find_output_brute(prog, 100, 40, workers=1) == (0, 4)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 3 examples, for both wire representations.
+"""
+
+import pytest
+
+from day03_crossed_wires import CollisionIndex, CompactWire, SegmentWire, Wire
+
+EXAMPLES = [('R8,U5,L5,D3', 'U7,R6,D4,L4', 6, 30),
+            ('R75,D30,R83,U83,L12,D49,R71,U7,L72',
+             'U62,R66,U55,R34,D71,R55,D58,R83', 159, 610),
+            ('R98,U47,R26,D63,R33,U87,L62,D20,R33,U53,R51',
+             'U98,R91,D20,R16,D67,R40,U7,R15,U6,R7', 135, 410)]
+
+WIRE_TYPES = [Wire, SegmentWire, CompactWire]
+
+@pytest.mark.parametrize('wire_type', WIRE_TYPES)
+@pytest.mark.parametrize('route1, route2, distance, latency', EXAMPLES)
+def test_get_collisions(wire_type, route1, route2, distance, latency):
+    wire1 = wire_type(route1.split(','))
+    wire2 = wire_type(route2.split(','))
+    collisions, colls_w_steps = wire1.getCollisions(wire2)
+    
+    assert min(abs(x) + abs(y) for x, y in collisions) == distance
+    assert min(colls_w_steps.values()) == latency
+
+@pytest.mark.parametrize('wire_type', WIRE_TYPES)
+def test_first_visit(wire_type):
+    # The first wire passes (1, 0) at steps 1 and 5; the first visit counts
+    wire1 = wire_type(['R2', 'U1', 'L1', 'D2'])
+    wire2 = wire_type(['D2', 'R1', 'U3'])
+    collisions, colls_w_steps = wire1.getCollisions(wire2)
+    assert colls_w_steps == {(1, -1): 10, (1, 0): 6, (1, 1): 10}
+
+def test_compact_nodes():
+    wire = CompactWire(['R3', 'U2'])
+    wire.addRoute(['L5', 'D4'])
+    assert wire.getNodes() == Wire(['R3', 'U2', 'L5', 'D4']).getNodes()
+
+def test_segment_overlap():
+    # Collinear runs cross at every shared cell, but not at the origin
+    collisions, colls_w_steps = SegmentWire(['R5']).getCollisions(SegmentWire(['U1', 'R3', 'D1', 'L1']))
+    assert collisions == {(3, 0), (2, 0)}
+    assert colls_w_steps == {(3, 0): 3 + 5, (2, 0): 2 + 6}
+
+def test_collision_index():
+    routes = ['R8,U5,L5,D3', 'L2', 'U7,R6,D4,L4']
+    index = CollisionIndex([SegmentWire(r.split(',')) for r in routes])
+    
+    assert index.getCrossings() == {(0, 2): {(3, 3): 40, (6, 5): 30}}
+    assert index.getClosest() == (6, (0, 2), (3, 3))
+    assert index.getFastest() == (30, (0, 2), (6, 5))
+    
+    # Adding a wire brings in its crossings with every wire already indexed
+    assert index.addWire(SegmentWire(['U3', 'R10'])) == 3
+    assert set(index.getCrossings()) == {(0, 2), (0, 3), (2, 3)}
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 4 examples.
+"""
+
+import pytest
+
+from day04_secure_container import (EXACT_PAIR, HAS_MATCH, RunRule, count_valid_pwd,
+                                    get_all_valid_pwd, is_valid, nondecreasing,
+                                    scan_all_valid_pwd)
+
+def test_part1():
+    assert is_valid(111111, 100000, 300000, False) == True
+    assert is_valid(223450, 100000, 300000, False) == False
+    assert is_valid(123789, 100000, 300000, False) == False
+
+def test_part2():
+    assert is_valid(112233, 100000, 300000, True) == True
+    assert is_valid(123444, 100000, 300000, True) == False
+    assert is_valid(111122, 100000, 300000, True) == True
+
+@pytest.mark.parametrize('strict', [False, True])
+@pytest.mark.parametrize('begin, end', [(223000, 260000), (111111, 111122), (99000, 100100)])
+def test_enumeration_matches_scan(begin, end, strict):
+    assert get_all_valid_pwd(begin, end, strict) == scan_all_valid_pwd(begin, end, strict)
+    assert count_valid_pwd(begin, end, strict) == len(scan_all_valid_pwd(begin, end, strict))
+
+def test_nondecreasing():
+    # Multisets of six digits 1-9
+    assert sum(1 for _ in nondecreasing(100000, 999999)) == 3003
+    assert [n for n, _ in nondecreasing(10, 99, 2)][:3] == [11, 12, 13]
+    assert count_valid_pwd(10 ** 11, 10 ** 12 - 1, True, 12) == 98088
+
+@pytest.mark.parametrize('rule', [HAS_MATCH, EXACT_PAIR])
+@pytest.mark.parametrize('begin, end, length', [(0, 10 ** 9, 9), (3, 7, 1), (11, 99, 2),
+                                                (1234567, 7654321, 7), (5000, 4000, 4)])
+def test_digit_dp_matches_enumeration(begin, end, length, rule):
+    assert (count_valid_pwd(begin, end, False, length, rule) ==
+            len(get_all_valid_pwd(begin, end, False, length, rule)))
+
+def test_custom_rule():
+    # A pair, but no run longer than two
+    pairs_only = RunRule(3, (False, True),
+                         lambda state, run: (state[0] or run == 2, state[1] and run <= 2),
+                         lambda state: state[0] and state[1])
+    valid = get_all_valid_pwd(100000, 999999, False, rule=pairs_only)
+    assert 112233 in valid and 111223 not in valid
+    assert count_valid_pwd(100000, 999999, False, rule=pairs_only) == len(valid)
+
+def test_long_bounds():
+    assert count_valid_pwd(10 ** 19, 10 ** 20 - 1, True, 20) == 2420163
+    assert count_valid_pwd(10 ** 29, 10 ** 30 - 1, True, 30) == 36197277
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 5 examples.
+"""
+
+from intcode import Instruction, parse_instruction
+
+def test_parse_instruction():
+    assert (parse_instruction(1002) == Instruction(2, 0, 1, 0, 4))
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 6 examples.
+"""
+
+import numpy as np
+import os
+import pytest
+import random
+
+from itertools import product
+
+from conftest import ROOT
+
+from day06_universal_orbit import (OrbitGraph, OrbitMap, TransferIndex, get_orbit_count,
+                                   get_path_to_root, get_total_orbit_count, get_transfer,
+                                   intern_tree, load_orbit_graph, make_depths, make_tree)
+
+EX1 = ['COM)B','B)C','C)D','D)E','E)F','B)G','G)H','D)I','E)J','J)K','K)L']
+EX2 = ['COM)B','B)C','C)D','D)E','E)F','B)G','G)H','D)I','E)J','J)K','K)L','K)YOU','I)SAN']
+
+def test_get_orbit_count():
+    ex_tree = make_tree(EX1)
+    assert get_orbit_count('D', ex_tree) == 3
+    assert get_orbit_count('L', ex_tree) == 7
+    assert get_orbit_count('COM', ex_tree) == 0
+
+def test_get_total_orbit_count():
+    assert get_total_orbit_count(make_tree(EX1)) == 42
+
+def test_get_path_to_root():
+    ex_tree2 = make_tree(EX2)
+    assert get_path_to_root('YOU', ex_tree2) == ['K','J','E','D','C','B','COM']
+    assert get_path_to_root('SAN', ex_tree2) == ['I','D','C','B','COM']
+
+def test_get_transfer():
+    assert get_transfer('YOU','SAN', make_tree(EX2)) == 4
+
+def test_make_depths():
+    ex_tree = make_tree(EX1)
+    depths = make_depths(ex_tree)
+    assert all(get_orbit_count(body, ex_tree, depths) == get_orbit_count(body, ex_tree)
+               for body in ex_tree)
+    assert depths['COM'] == 0
+
+def test_deep_chain():
+    chain = make_tree([f'N{i})N{i + 1}' for i in range(200000)] + ['COM)N0'])
+    assert get_total_orbit_count(chain) == 200001 * 200002 // 2
+
+def test_detached_body():
+    with pytest.raises(KeyError):
+        get_total_orbit_count(make_tree(EX1 + ['X)Y']))
+
+def test_root_with_parent():
+    # COM said to orbit a body of its own tree: walking stops at COM anyway
+    looped = make_tree(['COM)B', 'B)C', 'C)COM'])
+    assert make_depths(looped) == {'COM': 0, 'B': 1, 'C': 2}
+    assert get_total_orbit_count(looped) == 3
+    assert intern_tree(looped).getTotalOrbitCount() == 3
+    
+    orbits = OrbitMap(looped)
+    assert orbits.getTotalOrbitCount() == 3
+    assert orbits.getSubtree('COM') == ['COM', 'B', 'C']
+
+def test_transfer_index():
+    ex_tree2 = make_tree(EX2)
+    index = TransferIndex(ex_tree2)
+    assert index.getTransfer('YOU', 'SAN') == 4
+    
+    # Every pair, including COM and a body with itself, agrees with walking
+    pairs = list(product(['COM'] + list(ex_tree2), repeat=2))
+    assert index.getTransfers(pairs) == [get_transfer(a, b, ex_tree2) for a, b in pairs]
+    assert index.getOrbitCount('L') == 7
+
+def test_orbit_graph():
+    ex_tree2 = make_tree(EX2)
+    graph = intern_tree(ex_tree2)
+    assert graph.getTotalOrbitCount() == get_total_orbit_count(ex_tree2)
+    assert graph.getOrbitCount('L') == 7
+    assert graph.getPathToRoot('YOU') == get_path_to_root('YOU', ex_tree2)
+    assert graph.getPathToRoot('COM') == []
+    assert graph.getSubtreeSize('COM') == len(ex_tree2) + 1
+    assert graph.getSubtreeSize('E') == 6
+    assert graph.getSubtreeSize('SAN') == 1
+    assert graph.getTransfer('YOU', 'SAN') == 4
+
+def test_orbit_graph_random():
+    # Ids in no particular order: children may be numbered before parents
+    rng = random.Random(6)
+    names = ['COM'] + [f'B{i}' for i in range(1, 2000)]
+    galaxy = make_tree([f'{names[rng.randrange(i)]}){names[i]}' for i in range(1, 2000)])
+    shuffled = names[:]
+    rng.shuffle(shuffled)
+    ids = {name: i for i, name in enumerate(shuffled)}
+    parent = np.arange(len(names), dtype=np.int32)
+    for child, orbited in galaxy.items():
+        parent[ids[child]] = ids[orbited]
+    graph = OrbitGraph(shuffled, parent)
+    
+    depths = make_depths(galaxy)
+    assert [depths[name] for name in shuffled] == graph.depth.tolist()
+    sizes = graph.getSubtreeSizes()
+    assert sizes[ids['COM']] == len(names)
+    assert all(sizes[ids[name]] == 1 + sum(name in get_path_to_root(b, galaxy) for b in galaxy)
+               for name in rng.sample(names, 20))
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(300)]
+    assert graph.getTransfers(pairs) == [get_transfer(a, b, galaxy) for a, b in pairs]
+
+def test_subtree_sizes():
+    # Wide levels, a long chain, and wide levels again below the chain
+    orbits = [f'COM)W{i}' for i in range(300)] + [f'W{i})X{i}' for i in range(300)]
+    orbits += ['X7)C0'] + [f'C{i})C{i + 1}' for i in range(500)]
+    orbits += [f'C500)L{i}' for i in range(300)] + [f'L{i})M{i}' for i in range(200)]
+    galaxy = make_tree(orbits)
+    graph = intern_tree(galaxy)
+    
+    expected = dict.fromkeys(graph.names, 1)
+    for body in reversed(list(make_depths(galaxy))):
+        if body != 'COM':
+            expected[galaxy[body]] += expected[body]
+    assert graph.getSubtreeSizes().tolist() == [expected[name] for name in graph.names]
+    assert graph.getSubtreeSize('C0') == 1 + 500 + 300 + 200
+
+def test_orbit_graph_errors():
+    with pytest.raises(KeyError):
+        intern_tree(make_tree(EX1 + ['X)Y']))
+    with pytest.raises(KeyError):
+        intern_tree(make_tree(EX1 + ['X)Y', 'Y)X']))
+
+def test_orbit_graph_chain():
+    graph = intern_tree(make_tree([f'N{i})N{i + 1}' for i in range(200000)] + ['COM)N0']))
+    assert graph.getTotalOrbitCount() == 200001 * 200002 // 2
+    assert graph.getTransfer('N5', 'N199999') == 199994
+    assert graph.getSubtreeSize('N0') == 200001
+
+def test_load_orbit_graph(tmp_path):
+    path = tmp_path / 'orbits.txt'
+    path.write_bytes('\r\n'.join(EX2).encode() + b'\r\n')
+    graph = load_orbit_graph(str(path))
+    assert graph.getTotalOrbitCount() == 54
+    assert graph.getTransfer('YOU', 'SAN') == 4
+    assert sorted(graph.names) == sorted(['COM'] + list(make_tree(EX2)))
+    
+    path.write_bytes(b'')
+    assert load_orbit_graph(str(path)).getTotalOrbitCount() == 0
+
+def test_load_shipped_input():
+    path = os.path.join(ROOT, 'Day06', 'day06_input.txt')
+    graph = load_orbit_graph(path)
+    with open(path) as inp:
+        galaxy = make_tree(inp.read().split())
+    assert graph.getTotalOrbitCount() == get_total_orbit_count(galaxy)
+    assert graph.getTransfer('YOU', 'SAN') == get_transfer('YOU', 'SAN', galaxy)
+
+def test_orbit_map():
+    orbits = OrbitMap(make_tree(EX2))
+    assert orbits.getTotalOrbitCount() == 54
+    
+    # YOU moves to orbit I, as in the puzzle; K loses a satellite
+    orbits.reparent('YOU', 'I')
+    assert orbits.getOrbitCount('YOU') == 5
+    orbits.reparent('J', 'COM')
+    assert orbits.getOrbitCount('L') == 3
+    assert orbits.getTotalOrbitCount() == get_total_orbit_count(orbits.parent)
+    
+    with pytest.raises(ValueError):
+        orbits.reparent('B', 'H')
+    with pytest.raises(ValueError):
+        orbits.removeLeaf('K')
+    with pytest.raises(ValueError):
+        orbits.addLeaf('L', 'COM')
+    with pytest.raises(KeyError):
+        OrbitMap(make_tree(EX1 + ['X)Y']))
+
+def test_orbit_map_random():
+    rng = random.Random(25)
+    orbits = OrbitMap()
+    names = ['COM']
+    
+    for step in range(600):
+        kind = rng.random()
+        if kind < 0.5 or len(names) < 3:
+            name = f'B{step}'
+            orbits.addLeaf(name, rng.choice(names))
+            names.append(name)
+        elif kind < 0.7:
+            leaves = [n for n in names[1:] if not orbits.children[n]]
+            leaf = rng.choice(leaves)
+            orbits.removeLeaf(leaf)
+            names.remove(leaf)
+        else:
+            node = rng.choice(names[1:])
+            targets = [n for n in names if n not in orbits.getSubtree(node)]
+            orbits.reparent(node, rng.choice(targets))
+        assert orbits.getTotalOrbitCount() == get_total_orbit_count(orbits.parent)
+    assert orbits.depth == make_depths(orbits.parent)
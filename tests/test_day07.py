@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 7 examples, for both amplifier circuits.
+"""
+
+import pytest
+
+import day07_amp_circuit
+import day07_amp_circuit2
+
+P1 = [3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0]
+S1 = (4,3,2,1,0)
+
+P2 = [3,23,3,24,1002,24,10,24,1002,23,-1,23,101,5,23,23,1,24,23,23,4,23,99,0,0]
+S2 = (0,1,2,3,4)
+
+P3 = [3,31,3,32,1002,32,10,32,1001,31,-2,31,1007,31,0,33,1002,33,7,33,1,33,31,31,1,32,31,31,4,31,99,0,0,0]
+S3 = (1,0,4,3,2)
+
+P4 = [3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5]
+
+EXAMPLES = [(P1, S1, 43210), (P2, S2, 54321), (P3, S3, 65210)]
+
+@pytest.mark.parametrize('program, seq, thrust', EXAMPLES)
+def test_get_thrust_signal(program, seq, thrust):
+    assert day07_amp_circuit.get_thrust_signal(0, seq, program.copy()) == thrust
+    assert day07_amp_circuit2.get_thrust_signal(0, seq, program.copy(), False) == thrust
+
+@pytest.mark.parametrize('program, seq, thrust', EXAMPLES)
+def test_get_max_thrust(program, seq, thrust):
+    assert day07_amp_circuit.get_max_thrust(0, program.copy(), False) == (thrust, list(seq))
+    assert day07_amp_circuit2.get_max_thrust(0, program.copy(), False) == (thrust, list(seq))
+
+def test_get_max_thrust_feedback():
+    t4, os4 = day07_amp_circuit2.get_max_thrust_network(0, P4.copy(), True)
+    assert t4 == 139629729 and os4 == [9,8,7,6,5]
+
+def test_run_intcode_repeats_second_input():
+    # Reads three inputs and outputs their sum: the third read gets in2 again
+    program = [3,20,3,21,3,22,1,20,21,23,1,22,23,23,4,23,99] + [0] * 7
+    assert day07_amp_circuit.run_intcode(program, 1, 10) == 21
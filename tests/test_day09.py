@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Advent of Code, 2019, Day 9 examples.
+"""
+
+from day09_sensor_boost import run_intcode
+
+def test_large_numbers():
+    assert len(str((run_intcode([1102,34915192,34915192,7,4,7,99,0], 0)))) == 16
+    assert (run_intcode([104,1125899906842624,99],0) == 1125899906842624)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Every day module has to import as a library without running anything or
+changing sys.path.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import DAYS, ROOT
+
+MODULES = sorted(f[:-3] for day in DAYS for f in os.listdir(os.path.join(ROOT, day))
+                 if f.endswith('.py'))
+
+PROBE = '''
+import sys, time
+sys.path[:0] = {paths!r}
+before = list(sys.path)
+start = time.perf_counter()
+import {module}
+sys.stderr.write(f'{{time.perf_counter() - start:.4f}}')
+if sys.path != before:
+    print('sys.path changed')
+'''
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_is_silent(module):
+    paths = [ROOT] + [os.path.join(ROOT, day) for day in DAYS]
+    result = subprocess.run([sys.executable, '-c', PROBE.format(paths=paths, module=module)],
+                            capture_output=True, text=True, cwd=ROOT, check=True)
+    assert result.stdout == ''
+    print(f'{module} imported in {float(result.stderr) * 1000:.1f} ms')
@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Intcode package: memory, VM and the tools built on them.
+"""
+
+import asyncio
+import json
+import os
+import pytest
+
+from array import array
+from collections import deque
+
+from conftest import ROOT
+from intcode import DECODE_TABLE, VM, parse_instruction
+from intcode.aio import drain, run_network
+from intcode.batch import run_batch
+from intcode.disasm import build_cfg, disassemble, listing
+from intcode.jit import JITVM
+from intcode.profile import ProfiledVM, profile_program
+from intcode.search import search_max
+from intcode.memory import DIRECTORY_LIMIT, PAGE_SIZE, ZERO_PAGE, PagedMemory
+
+# Reads a value into address 11, outputs it doubled, and loops
+DOUBLER = [3,11,102,2,11,11,4,11,1105,1,0,0]
+
+# Counts address 20 up to 5, then halts
+COUNTER = [1001,20,1,20,1007,20,5,21,1005,21,0,99] + [0] * 10
+
+def output_score(program, candidate):
+    # Module level, so worker processes can unpickle it
+    vm = VM(program, [candidate])
+    vm.run()
+    return vm.outputs[-1]
+
+def test_decode_table():
+    assert len(DECODE_TABLE) == 10 * 27
+    for word in (2, 1002, 21101, 99):
+        assert word in DECODE_TABLE
+        assert parse_instruction(word).opcode == word % 100
+    with pytest.raises(ValueError):
+        parse_instruction(42)
+
+def test_vm_resume():
+    vm = VM(DOUBLER)
+    assert not vm.run()
+    assert vm.waiting
+    
+    vm.send(2, 5)
+    vm.run()
+    assert list(vm.outputs) == [4, 10]
+    assert vm.waiting and vm.ip == 0
+
+def test_vm_steps():
+    vm = VM(COUNTER)
+    # One round of the loop, then the first instruction of the next
+    vm.run(3)
+    assert vm.ip == 0 and vm.memory[20] == 1
+    vm.run(1)
+    assert vm.ip == 4 and vm.memory[20] == 2
+    assert vm.run()
+    assert vm.memory[20] == 5
+
+def test_vm_errors():
+    vm = VM([1101,1,1,5,42,0])
+    with pytest.raises(ValueError):
+        vm.run()
+    assert vm.ip == 4
+    with pytest.raises(ValueError):
+        VM([1105,1,-1]).run()
+    with pytest.raises(IndexError):
+        VM([4,-1,99]).run()
+
+def test_stream():
+    vm = VM(DOUBLER, [1, 2, 3])
+    assert list(vm.stream()) == [2, 4, 6]
+    assert vm.waiting
+    vm.send(4)
+    assert list(vm.stream()) == [8]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_search_max(workers):
+    # Outputs (x - 4) ** 2 negated: best at 4; 3 and 5 tie below it
+    program = [3,0,1001,0,-4,0,2,0,0,0,102,-1,0,0,4,0,99]
+    assert search_max(output_score, range(10), program, workers) == (0, 4)
+    assert search_max(output_score, [5, 3, 9], program, workers) == (-1, 5)
+
+def test_lazy_pages():
+    mem = PagedMemory([1, 2, 3])
+    assert mem.page_count() == 1
+    assert mem.size == 3
+    
+    # Reading untouched memory allocates nothing
+    assert mem[10 * PAGE_SIZE] == 0
+    assert mem.page_count() == 1
+    assert len(mem.pages) == 1
+    
+    mem[3 * PAGE_SIZE + 5] = 7
+    assert mem[3 * PAGE_SIZE + 5] == 7
+    assert mem.page_count() == 2
+    assert mem.size == 3 * PAGE_SIZE + 6
+    assert mem.pages[1] is ZERO_PAGE and mem.pages[2] is ZERO_PAGE
+    assert mem.to_list()[:4] == [1, 2, 3, 0]
+
+def test_far_pages():
+    mem = PagedMemory([1, 2, 3])
+    far = 5 * DIRECTORY_LIMIT * PAGE_SIZE + 17
+    mem[far] = 42
+    
+    # The directory does not grow to reach the far page
+    assert len(mem.pages) == 1
+    assert mem[far] == 42
+    assert mem[far + 1] == 0
+    assert mem.page_count() == 2
+    assert mem.size == far + 1
+
+def test_bigint_pages():
+    mem = PagedMemory([1, 2, 3])
+    assert isinstance(mem.pages[0], array)
+    
+    mem[1] = 1 << 70
+    assert isinstance(mem.pages[0], list)
+    assert mem.to_list() == [1, 1 << 70, 3]
+    
+    # A program too large for 64 bits starts out with list pages
+    mem = PagedMemory([-(1 << 80), 5])
+    assert mem.to_list() == [-(1 << 80), 5]
+    
+    vm = VM([1102, 1 << 40, 1 << 40, 7, 4, 7, 99, 0])
+    vm.run()
+    assert list(vm.outputs) == [1 << 80]
+
+def test_negative_address():
+    mem = PagedMemory([1, 2, 3])
+    with pytest.raises(IndexError):
+        mem[-1]
+    with pytest.raises(IndexError):
+        mem[-1] = 5
+
+def test_paged_fallback():
+    # An add that runs over the end of page 0, storing into page 1
+    end = PAGE_SIZE - 2
+    program = [1105,1,end] + [0] * (end - 3) + [1101,2,3,end + 8,4,end + 8,99]
+    vm = VM(program)
+    assert vm.run()
+    assert list(vm.outputs) == [5]
+    
+    # Stores into a page that is not there yet, and far beyond the directory
+    far = 3 * DIRECTORY_LIMIT * PAGE_SIZE
+    vm = VM([109,far,21101,5,6,0,204,0,1101,7,0,5000,4,5000,99])
+    assert vm.run()
+    assert list(vm.outputs) == [11, 7]
+    assert vm.memory.size == far + 1
+    
+    with pytest.raises(IndexError):
+        VM([109,-5,204,0,99]).run()
+    with pytest.raises(IndexError):
+        VM([109,-5,21101,1,1,0,99]).run(steps=5)
+
+@pytest.mark.parametrize('machine', [VM, JITVM])
+def test_bounded_outputs(machine):
+    vm = machine([104,1,104,2,104,3,99], outputs=deque(maxlen=2))
+    assert not vm.run()
+    assert list(vm.outputs) == [1, 2]
+    
+    # Running again on a full channel must not overwrite anything
+    assert not vm.run()
+    assert list(vm.outputs) == [1, 2]
+    
+    vm.outputs.clear()
+    assert vm.run()
+    assert list(vm.outputs) == [3]
+    assert list(machine([104,1,104,2,104,3,99], outputs=deque(maxlen=1)).stream()) == [1, 2, 3]
+
+@pytest.mark.parametrize('machine', [VM, JITVM, ProfiledVM])
+def test_fork_keeps_type(machine):
+    vm = machine(DOUBLER)
+    vm.run()
+    child = vm.fork()
+    assert type(child) is machine
+    
+    child.send(5)
+    child.run()
+    vm.send(3)
+    vm.run()
+    assert list(child.outputs) == [10]
+    assert list(vm.outputs) == [6]
+
+def test_fork_machine_state():
+    vm = JITVM(DOUBLER, [1])
+    vm.run()
+    child = vm.fork()
+    assert child.blocks == {} and vm.blocks
+    
+    vm = ProfiledVM(DOUBLER, [1])
+    vm.run()
+    child = vm.fork()
+    assert child.profile.hits == vm.profile.hits
+    child.send(2)
+    child.run()
+    assert child.profile.total > vm.profile.total
+
+def test_fork_copy_on_write():
+    vm = VM(DOUBLER)
+    vm.run()
+    child = vm.fork()
+    
+    # Every page is shared until one side stores into it
+    assert vm.memory.owned_page_count() == child.memory.owned_page_count() == 0
+    assert vm.memory.pages[0] is child.memory.pages[0]
+    
+    child.send(5)
+    child.run()
+    assert child.memory.owned_page_count() == 1
+    assert vm.memory.owned_page_count() == 0
+    assert child.memory[11] == 10
+    assert vm.memory[11] == 0
+    assert vm.memory.pages[0] is not child.memory.pages[0]
+
+def test_snapshot_restore():
+    vm = VM(DOUBLER)
+    vm.run()
+    snapshot = vm.snapshot()
+    
+    for value in (4, 7):
+        vm.send(value)
+        vm.run()
+        assert list(vm.outputs) == [2 * value]
+        assert vm.memory[11] == 2 * value
+        
+        vm.restore(snapshot)
+        assert not vm.outputs
+        assert vm.memory[11] == 0
+        assert vm.waiting
+
+def run_network_within(vms, edges, timeout: float = 2):
+    # Collect what the last VM outputs; a hang fails instead of blocking
+    result = asyncio.Queue()
+    edges = list(edges) + [(len(vms) - 1, result)]
+    asyncio.run(asyncio.wait_for(run_network(vms, edges), timeout))
+    return drain(result)
+
+def test_network_upstream_halts():
+    # The consumer wants two inputs, the producer only ever sends one
+    producer = VM([104,7,99])
+    consumer = VM([3,0,4,0,3,0,4,0,99])
+    assert run_network_within([producer, consumer], [(0, 1)]) == [7]
+    assert producer.halted
+    assert consumer.waiting
+
+def test_network_fan_in():
+    # Adds one input from each producer; the slow one halts last
+    adder = [3,20,3,21,1,20,21,22,4,22,99] + [0] * 12
+    slow = [1101,0,0,30,1001,30,1,30,1008,30,500,31,1006,31,4,104,5,99] + [0] * 14
+    vms = [VM([104,3,99]), VM(slow), VM(adder)]
+    assert run_network_within(vms, [(0, 2), (1, 2)]) == [8]
+    assert vms[2].halted
+    
+    # Both producers halt before a third input: the consumer stops
+    greedy = [3,0,3,0,3,0,99]
+    vms = [VM([104,3,99]), VM(slow), VM(greedy)]
+    assert run_network_within(vms, [(0, 2), (1, 2)]) == []
+    assert vms[2].waiting
+
+def assert_batch_matches(program, patches=None, inputs=None):
+    # Every batched instance ends exactly like the same instance run alone
+    count = len(patches) if patches is not None else len(inputs)
+    vms = run_batch(program, patches, inputs)
+    for k in range(count):
+        vm = VM(program, inputs[k] if inputs is not None else [])
+        for address, value in (patches[k] if patches is not None else {}).items():
+            vm.memory[address] = value
+        vm.run()
+        assert list(vms[k].outputs) == list(vm.outputs)
+        assert (vms[k].halted, vms[k].waiting) == (vm.halted, vm.waiting)
+        assert vms[k].memory.to_list()[:len(program)] == vm.memory.to_list()[:len(program)]
+    return vms
+
+def test_batch_patches():
+    # Day 2 style: noun and verb patched into a position-mode program
+    program = [1,0,0,3,1,1,2,3,1,3,4,3,1,5,0,3,2,1,10,19,99]
+    patches = [{1: noun, 2: verb} for noun in range(5) for verb in range(5)]
+    assert_batch_matches(program, patches)
+
+def test_batch_diverging_jumps():
+    program = [3,20,1005,20,8,104,0,99,104,1,99] + [0] * 10
+    vms = assert_batch_matches(program, inputs=[[0], [1], [0], [2]])
+    assert [list(vm.outputs) for vm in vms] == [[0], [1], [0], [1]]
+
+def test_batch_self_modifying():
+    # The input becomes the next instruction word
+    program = [3,2,0,7,99,0,0,55]
+    vms = assert_batch_matches(program, inputs=[[104], [4], [104]])
+    assert [list(vm.outputs) for vm in vms] == [[7], [55], [7]]
+
+def test_batch_starved_inputs():
+    vms = assert_batch_matches([3,0,3,0,4,0,99], inputs=[[1, 2], [1], [3, 4]])
+    assert vms[1].waiting
+
+def test_batch_large_values():
+    # Squares past 64 bits go to the scalar VM, as do inputs that never fit
+    square = [3,0,2,0,0,0,4,0,99]
+    vms = assert_batch_matches(square, inputs=[[3], [1 << 40], [-(1 << 35)]])
+    assert list(vms[1].outputs) == [1 << 80]
+    vms = assert_batch_matches(square, inputs=[[3], [1 << 70]])
+    assert list(vms[1].outputs) == [1 << 140]
+
+def test_batch_invalid_words():
+    # Words the VM rejects stop the instance on them, as run alone
+    vms = run_batch([1105,1,3,-1], inputs=[[], []])
+    assert [(vm.halted, vm.ip) for vm in vms] == [(False, 3), (False, 3)]
+    vms = run_batch([30104,5,99], inputs=[[]])
+    assert (vms[0].halted, vms[0].ip, list(vms[0].outputs)) == (False, 0, [])
+    with pytest.raises(ValueError):
+        vms[0].run()
+
+def read_program(day: str, name: str):
+    with open(os.path.join(ROOT, day, name), 'r') as inp:
+        return [int(i) for i in inp.read().strip().split(',')]
+
+def assert_jit_matches(program, inputs, steps=None):
+    # A step budget turns a stale compiled block looping forever into a failure
+    vm, jit = VM(program, inputs), JITVM(program, inputs)
+    vm.run(steps)
+    jit.run(steps)
+    assert list(jit.outputs) == list(vm.outputs)
+    assert jit.halted == vm.halted
+    assert jit.memory.to_list() == vm.memory.to_list()
+    return list(jit.outputs)
+
+@pytest.mark.parametrize('program, inputs, expected', [
+    # Store into the opcode of the next instruction in the same block
+    ([1101,0,104,4,4,9,99,0,0,55], [], [9]),
+    # Store into an operand word of the same block
+    ([1101,0,77,5,104,0,99], [], [77]),
+    # Input read straight into the next instruction word
+    ([3,2,0,7,99,0,0,55], [104], [7]),
+    ([3,2,0,7,99,0,0,55], [4], [55]),
+    # Store over the compiled halt that ends the block
+    ([1101,0,104,4,99,7,99], [], [7]),
+    # A block bumps its own operand and loops back into itself
+    ([104,1,1001,1,1,1,1007,1,4,30,1005,30,0,99] + [0] * 17, [], [1, 2, 3]),
+    # A later block bumps the operand of an earlier, compiled one
+    ([104,1,1105,1,5,1001,1,1,1,1007,1,4,20,1005,20,0,99] + [0] * 4, [], [1, 2, 3]),
+    # ... and finally turns its first instruction into a halt
+    ([104,1,1105,1,5,1001,1,1,1,1007,1,3,30,1005,30,0,1101,0,99,0,1105,1,0] + [0] * 8,
+     [], [1, 2]),
+])
+def test_jit_self_modifying(program, inputs, expected):
+    assert assert_jit_matches(program, inputs, 10000) == expected
+
+@pytest.mark.parametrize('day, name, value', [
+    ('Day05', 'day05_input.txt', 1), ('Day05', 'day05_input.txt', 5),
+    ('Day09', 'day09_input.txt', 1), ('Day09', 'day09_input.txt', 2)])
+def test_jit_shipped_inputs(day, name, value):
+    assert assert_jit_matches(read_program(day, name), [value])
+
+def test_disassemble():
+    # An unconditional jump over a data word
+    program = [1105,1,4,42,104,7,99]
+    assert sorted(disassemble(program)) == [0, 4, 6]
+    assert listing(program).split('\n') == ['     0  jnz 1, 4', '     3  data 42',
+                                            '     4  out 7', '     6  halt']
+
+def test_disassemble_returns():
+    # A call stores its return address (9), the subroutine jumps back indirectly
+    program = [1101,0,9,20,1105,1,10,0,0,99,6,21,20] + [0] * 9
+    assert 9 in disassemble(program)
+    assert 9 not in disassemble(program, infer_returns=False)
+    
+    blocks = build_cfg(program)
+    assert blocks[10].indirect
+    assert blocks[0].successors == [10]
+
+def test_build_cfg():
+    blocks = build_cfg(COUNTER)
+    assert sorted(blocks) == [0, 11]
+    assert blocks[0].successors == [0, 11]
+    assert blocks[0].predecessors == [0]
+    assert blocks[11].predecessors == [0]
+    assert not blocks[0].indirect
+
+def test_profile():
+    profile = profile_program(COUNTER)
+    assert profile.total == 16
+    assert profile.by_opcode() == {'add': 5, 'lt': 5, 'jnz': 5, 'halt': 1}
+    assert profile.by_mode()['add010'] == 5
+    assert profile.hot_loops() == [{'head': 0, 'tail': 8, 'iterations': 4,
+                                    'instructions': 15}]
+    assert json.loads(profile.to_json())['instructions'] == 16
+    assert 'intcode;loop_0_8;add010@0 5' in profile.to_folded().split('\n')
+
+def test_profile_restore():
+    vm = ProfiledVM(DOUBLER)
+    vm.run()
+    snapshot = vm.snapshot()
+    before = vm.profile.by_address()
+    
+    for value in (4, 7):
+        vm.send(value)
+        vm.run()
+        assert vm.profile.total > sum(before.values())
+        
+        # The counters go back with the rest of the state
+        vm.restore(snapshot)
+        assert vm.profile.by_address() == before
+        assert vm.hits is not snapshot.hits
+
+def test_profile_pauses():
+    # Instructions that pause count once, when they finally run
+    vm = ProfiledVM([3,9,4,9,3,9,4,9,99,0])
+    for value in (1, 2):
+        assert not vm.run()
+        vm.send(value)
+    assert vm.run()
+    assert vm.profile.total == 5
+    assert vm.profile.by_opcode() == {'in': 2, 'out': 2, 'halt': 1}
+    
+    vm = ProfiledVM([104,1,104,2,99], outputs=deque(maxlen=1))
+    assert not vm.run()
+    # Full channel: the second output gives up without running
+    assert not vm.run()
+    vm.outputs.clear()
+    assert not vm.run()
+    vm.outputs.clear()
+    assert vm.run()
+    assert vm.profile.by_opcode() == {'out': 2, 'halt': 1}